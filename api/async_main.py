@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+from quart import Quart, Response, request, jsonify, abort, g
+from quart_cors import cors
+from langchain.schema import HumanMessage
+from turns import get_model, get_system_message, warm_up, read_answer, sessions, unparsable_responses, RequestError
+from turns import MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS
+from batching import AsyncMicroBatcher
+import turns
+import metrics
+
+# Maximum number of model calls running at the same time
+MAX_CONCURRENT_CALLS = int(os.getenv('MAX_CONCURRENT_CALLS', '32'))
+
+# Initialize the app
+app = cors(Quart(__name__))
+
+# Bounds the model calls, the other requests wait here without blocking the server
+model_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+
+# Micro-batching of the model calls (see MICRO_BATCH_WAIT_MS in turns.py)
+batcher = AsyncMicroBatcher(lambda batch: get_model().agenerate(batch), MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS / 1000) if MICRO_BATCH_WAIT_MS > 0 else None
+
+
+
+# Get the agent state of a /play_one_turn request (see turns.read_state)
+def read_state(data):
+    try:
+        return turns.read_state(data)
+    except RequestError as e:
+        abort(e.status, e.description)
+
+# Check the body of a /play_turns request, and return its states (see turns.read_batch)
+def read_batch(data):
+    try:
+        return turns.read_batch(data)
+    except RequestError as e:
+        abort(e.status, e.description)
+
+# Ask the model for the next action of an agent
+async def play_state(state):
+    message = HumanMessage(content=str(state))
+    async with model_semaphore:
+        metrics.model_calls_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            if batcher:
+                answer = await batcher.submit([get_system_message(), message])
+            else:
+                result = await get_model().agenerate([[get_system_message(), message]])
+                answer = result.generations[0][0].message
+        except Exception:
+            metrics.model_errors_total.inc()
+            raise
+        finally:
+            metrics.model_calls_in_flight.dec()
+            metrics.model_call_seconds.observe(time.perf_counter() - start)
+    return read_answer(answer)
+
+
+
+# Decision of one state of a batch, or its error
+async def batch_item(state):
+    if not state:
+        return {'error': 'Missing state'}
+    try:
+        thoughts, action = await play_state(state)
+        return {'thoughts': thoughts, 'action': action}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+
+# Count and time every request
+@app.before_request
+async def start_request():
+    g.route = request.url_rule.rule if request.url_rule else 'unknown'
+    g.start_time = time.perf_counter()
+    metrics.requests_in_flight.inc(route=g.route)
+
+@app.after_request
+async def count_request(response):
+    metrics.requests_total.inc(route=g.route, status=response.status_code)
+    metrics.request_seconds.observe(time.perf_counter() - g.start_time, route=g.route)
+    return response
+
+@app.teardown_request
+async def end_request(error=None):
+    metrics.requests_in_flight.dec(route=g.route)
+
+
+
+# Define the API routes (same contract as main.py)
+@app.route('/play_one_turn', methods=['POST'])
+async def play():
+
+    # Get the state from the request
+    state = read_state(await request.get_json())
+
+    # Get the response from the model
+    thoughts, action = await play_state(state)
+
+    # Return the thoughts and action
+    return jsonify({
+        'thoughts': thoughts,
+        'action': action
+    })
+
+# Decide for several agents in one request, in the order of the states
+@app.route('/play_turns', methods=['POST'])
+async def play_turns():
+    states = read_batch(await request.get_json())
+    decisions = await asyncio.gather(*(batch_item(state) for state in states))
+    return jsonify({'decisions': list(decisions)})
+
+# Open a game session
+@app.route('/sessions', methods=['POST'])
+async def open_session():
+    return jsonify({'session_id': sessions.create()})
+
+# Close a game session
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+async def close_session(session_id):
+    sessions.delete(session_id)
+    return jsonify({})
+
+# Prometheus metrics
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    metrics.sessions_open.set(len(sessions))
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# Last unparsable model answers
+@app.route('/metrics/unparsable', methods=['GET'])
+async def get_unparsable():
+    return jsonify({'responses': unparsable_responses.list()})
+
+# Build the model now (e.g. from a readiness probe), returns the time it took
+@app.route('/warmup', methods=['POST'])
+async def warmup():
+    seconds = await asyncio.get_running_loop().run_in_executor(None, warm_up)
+    return jsonify({'seconds': seconds})
+
+@app.route('/hello', methods=['GET'])
+async def hello():
+    return "Hello World!"
+
+
+
+
+# For production, run several connections on one worker with an ASGI server:
+#   hypercorn async_main:app --bind 127.0.0.1:5000
+if __name__ == '__main__':
+    app.run(port=5000)
@@ -0,0 +1,144 @@
+"""
+Micro-batching of the model calls.
+Requests arriving within a few milliseconds of each other are sent to the
+model as one batched generation call (LangChain generate/agenerate over a list
+of message lists), and each request gets its own result back.
+
+Note: ChatOpenAI.generate runs the prompts of a batch one after the other,
+while agenerate runs them concurrently, so batching pays off with the async
+server or with a backend that generates batches natively.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+
+class MicroBatcher:
+    """
+    Batches model calls made from several threads (Flask server).
+    A collector thread gathers the requests, and each batch is generated on a
+    worker thread so that batches can overlap.
+    """
+
+    def __init__(self, generate, max_batch_size, max_wait, max_batches_in_flight=8):
+        """
+        Args:
+            generate (callable): Batched generation, e.g. model.generate
+            max_batch_size (int): Requests per batch at most
+            max_wait (float): Seconds to wait for more requests after the first one
+            max_batches_in_flight (int): Batches generated at the same time
+        """
+        self.generate = generate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=max_batches_in_flight)
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def submit(self, messages):
+        """
+        Queue a model call.
+
+        Args:
+            messages (list): Messages of the call (system and human messages)
+
+        Returns:
+            Future: Resolves to the answer message
+        """
+        future = Future()
+        self.requests.put((messages, future))
+        return future
+
+    def _collect(self):
+        """Gather the requests into batches (collector thread)."""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        """Generate a batch and complete its requests (worker thread)."""
+        metrics.model_batch_size.observe(len(batch))
+        try:
+            result = self.generate([messages for messages, _ in batch])
+            for (_, future), generations in zip(batch, result.generations):
+                future.set_result(generations[0].message)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class AsyncMicroBatcher:
+    """Batches model calls made from the event loop (async server)."""
+
+    def __init__(self, agenerate, max_batch_size, max_wait):
+        """
+        Args:
+            agenerate (callable): Batched async generation, e.g. model.agenerate
+            max_batch_size (int): Requests per batch at most
+            max_wait (float): Seconds to wait for more requests after the first one
+        """
+        self.agenerate = agenerate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = []
+        self.flush_handle = None
+        self._tasks = set()  # Batches in flight (the event loop only keeps weak references)
+
+    async def submit(self, messages):
+        """
+        Queue a model call and wait for its answer.
+
+        Args:
+            messages (list): Messages of the call (system and human messages)
+
+        Returns:
+            BaseMessage: The answer message
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((messages, future))
+
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send the pending requests as one batch."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        """Generate a batch and complete its requests."""
+        metrics.model_batch_size.observe(len(batch))
+        try:
+            result = await self.agenerate([messages for messages, _ in batch])
+            for (_, future), generations in zip(batch, result.generations):
+                if not future.done():
+                    future.set_result(generations[0].message)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
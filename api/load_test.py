@@ -0,0 +1,104 @@
+"""
+Load generator for the turn server, using the standard library only.
+Simulates concurrent games, each sending /play_one_turn requests one after
+the other, and reports the throughput and latency percentiles.
+
+Usage (with the stand-in model, see pygame_version/fake_llm_server.py):
+    python ../pygame_version/fake_llm_server.py --latency-mean 800
+    OPENAI_API_BASE=http://127.0.0.1:8000/v1 OPENAI_API_KEY=fake hypercorn async_main:app --bind 127.0.0.1:5000
+    python load_test.py --games 32 --turns 10
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def sample_state(turn):
+    """A plausible agent state, growing with the turn like the real historic."""
+    return {
+        'messages': [],
+        'historic': [
+            {'turn': t, 'actionNumber': 1, 'thoughts': "I move closer to the enemy target.", 'action': "MOVE [-1, -3]"}
+            for t in range(turn)
+        ],
+        'lastPosSeen': {'blue_1': {'position': [2, 1], 'turn': turn}},
+        'position': [-1, -3],
+        'life': 100,
+        'friends': [{'kind': 'agents', 'id': 'red_2', 'team': 'red', 'position': [-2, -1], 'life': 100}],
+        'enemies': [{'kind': 'agents', 'id': 'blue_1', 'team': 'blue', 'position': [2, 1], 'life': 75}],
+        'friendlyTarget': [],
+        'enemyTarget': [],
+        'obstacles': [],
+        'bonuses': [],
+        'actionsLeft': 3,
+        'possibleActions': ["MOVE [-1, -2]", "MOVE [0, -3]", "ATTACK [2, 1]", "SPEAK [-2, -1]"],
+    }
+
+
+def play_game(url, turns, batch, latencies, decided, errors, lock):
+    """Send the requests of one game, sequentially (batch states per request with /play_turns)."""
+    for turn in range(turns):
+        if batch:
+            body = {'states': [sample_state(turn) for _ in range(batch)]}
+        else:
+            body = {'state': sample_state(turn)}
+        req = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'), headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                answer = json.loads(response.read())
+            decisions = answer['decisions'] if batch else [answer]
+            ok = sum(1 for d in decisions if d.get('action'))
+        except (urllib.error.URLError, OSError, ValueError, KeyError):
+            ok = 0
+        with lock:
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            errors.extend([turn] * ((batch or 1) - ok))
+            decided.append(ok)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the BattleField Agents turn server")
+    parser.add_argument('--url', default="http://127.0.0.1:5000/play_one_turn", help='Endpoint (default: %(default)s)')
+    parser.add_argument('--games', type=int, default=16, help='Concurrent games (default: %(default)s)')
+    parser.add_argument('--turns', type=int, default=10, help='Requests per game (default: %(default)s)')
+    parser.add_argument('--batch', type=int, default=0,
+                        help='States per request, sent to /play_turns (default: one state to /play_one_turn)')
+    args = parser.parse_args()
+
+    url = args.url
+    if args.batch and url.endswith('/play_one_turn'):
+        url = url[:-len('/play_one_turn')] + '/play_turns'
+
+    latencies, decided, errors, lock = [], [], [], threading.Lock()
+    threads = [
+        threading.Thread(target=play_game, args=(url, args.turns, args.batch, latencies, decided, errors, lock))
+        for _ in range(args.games)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{args.games} games x {args.turns} turns in {duration:.1f}s")
+    print(f"  {sum(decided)} decisions, {len(errors)} errors, {len(latencies) / duration:.1f} requests/s, "
+          f"{sum(decided) / duration:.1f} decisions/s")
+    print(f"  latency p50 {percentile(latencies, 50) * 1000:.0f} ms, p90 {percentile(latencies, 90) * 1000:.0f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,48 +1,88 @@
 import os
-from flask import Flask, request, jsonify, abort
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, abort, g
 from flask_cors import CORS
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from dotenv import load_dotenv
-
-# Load env variables
-load_dotenv()
+from langchain.schema import HumanMessage
+from turns import get_model, get_system_message, warm_up, read_answer, sessions, unparsable_responses, RequestError
+from turns import MAX_BATCH_SIZE, MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS
+from batching import MicroBatcher
+import turns
+import metrics
 
 # Initialize the app
 app = Flask(__name__)
 CORS(app)
 
-# Initialize the model
-model = ChatOpenAI(
-    client="openai", 
-    #model="gpt-3.5-turbo", 
-    model="gpt-4", 
-    temperature=0.7,
-    openai_api_key=os.getenv('OPENAI_API_KEY'),
-)
+# Warm the model up when the server starts instead of on the first request
+WARM_UP_ON_START = os.getenv('WARM_UP_ON_START', '0') == '1'
 
-# Initialize the system message
-system_txt = ""
-with open('./prompts/system_message.txt', 'r') as f:
-    system_txt = f.read()
-system_message = SystemMessage(content=(system_txt))
+# Runs the model calls of a /play_turns request concurrently
+batch_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_SIZE)
 
-print(system_txt)
+# Micro-batching of the model calls (see MICRO_BATCH_WAIT_MS in turns.py)
+batcher = MicroBatcher(lambda batch: get_model().generate(batch), MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS / 1000) if MICRO_BATCH_WAIT_MS > 0 else None
 
+# Get the agent state of a /play_one_turn request (see turns.read_state)
+def read_state(data):
+    try:
+        return turns.read_state(data)
+    except RequestError as e:
+        abort(e.status, e.description)
+
+# Ask the model for the next action of an agent
+def play_state(state):
+    message = HumanMessage(content=str(state))
+    metrics.model_calls_in_flight.inc()
+    start = time.perf_counter()
+    try:
+        if batcher:
+            response = batcher.submit([get_system_message(), message]).result()
+        else:
+            response = get_model()([get_system_message(), message])
+    except Exception:
+        metrics.model_errors_total.inc()
+        raise
+    finally:
+        metrics.model_calls_in_flight.dec()
+        metrics.model_call_seconds.observe(time.perf_counter() - start)
+    return read_answer(response)
+
+# Check the body of a /play_turns request, and return its states (see turns.read_batch)
+def read_batch(data):
+    try:
+        return turns.read_batch(data)
+    except RequestError as e:
+        abort(e.status, e.description)
+
+# Decision of one state of a batch, or its error
+def batch_item(state):
+    if not state:
+        return {'error': 'Missing state'}
+    try:
+        thoughts, action = play_state(state)
+        return {'thoughts': thoughts, 'action': action}
+    except Exception as e:
+        return {'error': str(e)}
 
 
-# Parse the response into thoughts and action
-def read_answer(response):
-    message = response.content
-    try:
-        lines = message.split('\n')
-        thoughts = [l for l in lines if l.startswith('THOUGHTS: ')][0][10:]
-        action = [l for l in lines if l.startswith('ACTION: ')][0][8:]
-        return thoughts, action
-    except:
-        with open('response.txt', 'w') as f:
-            f.write(response.content)
-        return "", ""
+
+# Count and time every request
+@app.before_request
+def start_request():
+    g.route = request.url_rule.rule if request.url_rule else 'unknown'
+    g.start_time = time.perf_counter()
+    metrics.requests_in_flight.inc(route=g.route)
+
+@app.after_request
+def count_request(response):
+    metrics.requests_total.inc(route=g.route, status=response.status_code)
+    metrics.request_seconds.observe(time.perf_counter() - g.start_time, route=g.route)
+    return response
+
+@app.teardown_request
+def end_request(error=None):
+    metrics.requests_in_flight.dec(route=g.route)
 
 
 
@@ -51,13 +91,10 @@ def read_answer(response):
 def play():
 
     # Get the state from the request
-    if not (request.json and 'state' in request.json):
-        abort(400, 'Missing state parameter')
+    state = read_state(request.json)
 
     # Get the response from the model
-    message = HumanMessage(content=str(request.json['state']))
-    response = model([system_message, message])
-    thoughts, action = read_answer(response)
+    thoughts, action = play_state(state)
 
     # Return the thoughts and action
     return jsonify({
@@ -65,6 +102,40 @@ def play():
         'action': action
     })
 
+# Decide for several agents in one request, in the order of the states
+@app.route('/play_turns', methods=['POST'])
+def play_turns():
+    states = read_batch(request.json)
+    decisions = list(batch_executor.map(batch_item, states))
+    return jsonify({'decisions': decisions})
+
+# Open a game session
+@app.route('/sessions', methods=['POST'])
+def open_session():
+    return jsonify({'session_id': sessions.create()})
+
+# Close a game session
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    sessions.delete(session_id)
+    return jsonify({})
+
+# Prometheus metrics
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    metrics.sessions_open.set(len(sessions))
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# Last unparsable model answers
+@app.route('/metrics/unparsable', methods=['GET'])
+def get_unparsable():
+    return jsonify({'responses': unparsable_responses.list()})
+
+# Build the model now (e.g. from a readiness probe), returns the time it took
+@app.route('/warmup', methods=['POST'])
+def warmup():
+    return jsonify({'seconds': warm_up()})
+
 @app.route('/hello', methods=['GET'])
 def hello():
     return "Hello World!"
@@ -72,5 +143,9 @@ def hello():
 
 
 
+# With WARM_UP_ON_START=1, the model is built at import time (once in the master with gunicorn --preload)
+if WARM_UP_ON_START:
+    warm_up()
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,133 @@
+"""
+Metrics of the turn server, exposed in the Prometheus text format on /metrics.
+Also keeps the last unparsable model answers in memory, for /metrics/unparsable.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+class Metric:
+    """Base class: a metric with a value per label set (thread-safe)."""
+    kind = 'untyped'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}  # tuple of (label, value) -> value
+        self.lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{format_labels(labels)} {value}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts, total, observations = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value, observations + 1)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            for labels, (counts, total, observations) in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{self.name}_bucket{format_labels(labels + (("le", "+Inf"),))} {observations}')
+                lines.append(f'{self.name}_sum{format_labels(labels)} {total}')
+                lines.append(f'{self.name}_count{format_labels(labels)} {observations}')
+        return lines
+
+
+# Metrics of the server
+requests_total = Counter('turn_server_requests_total', 'HTTP requests handled, by route and status.')
+requests_in_flight = Gauge('turn_server_requests_in_flight', 'HTTP requests being handled, by route.')
+request_seconds = Histogram('turn_server_request_seconds', 'End-to-end handling time of the HTTP requests, by route.')
+model_calls_in_flight = Gauge('turn_server_model_calls_in_flight', 'Model calls waiting for an answer.')
+model_call_seconds = Histogram('turn_server_model_call_seconds', 'Duration of the model calls.')
+model_errors_total = Counter('turn_server_model_errors_total', 'Model calls that raised an error.')
+parse_failures_total = Counter('turn_server_parse_failures_total', 'Model answers without a valid action.')
+sessions_open = Gauge('turn_server_sessions', 'Game sessions kept in memory.')
+model_batch_size = Histogram('turn_server_model_batch_size', 'Model calls per micro-batch.', BATCH_SIZE_BUCKETS)
+
+ALL_METRICS = [
+    requests_total, requests_in_flight, request_seconds,
+    model_calls_in_flight, model_call_seconds, model_errors_total,
+    parse_failures_total, sessions_open, model_batch_size,
+]
+
+
+def render_metrics():
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+
+class ResponseRing:
+    """The last unparsable model answers (thread-safe, bounded)."""
+
+    def __init__(self, size):
+        self.entries = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, content, reason):
+        with self.lock:
+            self.entries.append({'time': time.time(), 'reason': reason, 'content': content})
+
+    def list(self):
+        with self.lock:
+            return list(self.entries)
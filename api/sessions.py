@@ -0,0 +1,138 @@
+"""
+Game sessions of the turn server.
+A client opens a session once, then each /play_one_turn request only sends
+what changed in the agent's state since its previous request. The server keeps
+the full state of every agent in a bounded LRU store, where idle sessions
+expire after a TTL.
+
+Delta format:
+    {"set": {field: value, ...}, "append": {field: [new items], ...}}
+"set" replaces fields, "append" extends the list fields (historic, messages).
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+# Fields a delta can append to, the other ones keep a fixed shape
+APPEND_FIELDS = ('historic', 'messages')
+
+
+class SessionNotFound(KeyError):
+    """The session doesn't exist, or has expired or been evicted."""
+
+
+def apply_delta(state, delta):
+    """
+    Merge a delta into an agent state, in place.
+    The whole delta is checked first, so an invalid one leaves the state unchanged.
+
+    Args:
+        state (dict): The agent state kept by the server
+        delta (dict): {"set": {...}, "append": {...}}
+
+    Returns:
+        dict: The updated state
+
+    Raises:
+        ValueError: If the delta is malformed
+    """
+    if not isinstance(delta, dict):
+        raise ValueError("delta must be an object")
+    updates = delta.get('set', {})
+    appends = delta.get('append', {})
+    if not isinstance(updates, dict):
+        raise ValueError("set must be an object")
+    if not isinstance(appends, dict):
+        raise ValueError("append must be an object")
+    for field, items in appends.items():
+        if field not in APPEND_FIELDS:
+            raise ValueError(f"can't append to {field}, only to {', '.join(APPEND_FIELDS)}")
+        if not isinstance(items, list):
+            raise ValueError(f"append.{field} must be a list")
+        target = updates[field] if field in updates else state.get(field, [])
+        if not isinstance(target, list):
+            raise ValueError(f"{field} is not a list, can't append to it")
+
+    state.update(updates)
+    for field, items in appends.items():
+        state.setdefault(field, []).extend(items)
+    return state
+
+
+class SessionStore:
+    """
+    Bounded LRU store of game sessions with TTL eviction (thread-safe).
+    A session maps agent IDs to their full state.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=3600.0):
+        """
+        Args:
+            max_sessions (int): Sessions kept; the least recently used is evicted beyond
+            ttl (float): Seconds after which an unused session expires
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # session_id -> (last_used, {agent_id: state})
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        """Drop expired sessions, then the least recently used ones (lock held)."""
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def create(self):
+        """
+        Open a new session.
+
+        Returns:
+            str: The session ID
+        """
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            now = time.monotonic()
+            self._sessions[session_id] = (now, {})
+            self._evict(now)
+        return session_id
+
+    def delete(self, session_id):
+        """Close a session (no error if it doesn't exist)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def update(self, session_id, agent_id, delta):
+        """
+        Apply an agent's delta and get its full state.
+
+        Args:
+            session_id (str): Session returned by create()
+            agent_id (str): The agent
+            delta (dict): Changes since the agent's previous request
+
+        Returns:
+            dict: Copy of the agent's full state
+
+        Raises:
+            SessionNotFound: If the session expired or was evicted (the
+                client must open a new one and send the full state)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            if session_id not in self._sessions:
+                raise SessionNotFound(session_id)
+
+            _, agents = self._sessions.pop(session_id)
+            self._sessions[session_id] = (now, agents)  # Most recently used last
+            state = apply_delta(agents.setdefault(agent_id, {}), delta)
+            return dict(state)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
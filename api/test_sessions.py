@@ -0,0 +1,60 @@
+"""
+Session deltas of the turn server (sessions.py).
+"""
+
+import unittest
+
+from sessions import SessionNotFound, SessionStore, apply_delta
+
+
+class ApplyDeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = {'position': [1, 2], 'life': 100, 'historic': [{'turn': 1}], 'messages': []}
+
+    def test_set_and_append(self):
+        apply_delta(self.state, {'set': {'life': 75}, 'append': {'historic': [{'turn': 2}], 'messages': ["hi"]}})
+        self.assertEqual(self.state['life'], 75)
+        self.assertEqual(self.state['historic'], [{'turn': 1}, {'turn': 2}])
+        self.assertEqual(self.state['messages'], ["hi"])
+
+    def test_append_only_to_append_fields(self):
+        for field in ('position', 'possibleActions', 'sight'):
+            with self.assertRaises(ValueError):
+                apply_delta(self.state, {'append': {field: [3]}})
+        self.assertEqual(self.state['position'], [1, 2])
+        self.assertNotIn('possibleActions', self.state)
+
+    def test_invalid_delta_changes_nothing(self):
+        before = {k: list(v) if isinstance(v, list) else v for k, v in self.state.items()}
+        invalid = [
+            {'set': {'life': 50}, 'append': {'historic': {'turn': 2}}},
+            {'set': {'life': 50}, 'append': {'historic': [{'turn': 2}], 'position': [0]}},
+            {'set': {'life': 50, 'messages': "hi"}, 'append': {'messages': ["hi"]}},
+            {'set': [('life', 50)]},
+            ["life", 50],
+        ]
+        for delta in invalid:
+            with self.assertRaises(ValueError):
+                apply_delta(self.state, delta)
+            self.assertEqual(self.state, before)
+
+
+class SessionStoreTest(unittest.TestCase):
+
+    def test_update_returns_full_state(self):
+        store = SessionStore()
+        session_id = store.create()
+        store.update(session_id, 'red_1', {'set': {'life': 100, 'historic': []}})
+        state = store.update(session_id, 'red_1', {'append': {'historic': [{'turn': 1}]}})
+        self.assertEqual(state, {'life': 100, 'historic': [{'turn': 1}]})
+
+    def test_expired_session(self):
+        store = SessionStore(ttl=0)
+        session_id = store.create()
+        with self.assertRaises(SessionNotFound):
+            store.update(session_id, 'red_1', {})
+
+
+if __name__ == "__main__":
+    unittest.main()
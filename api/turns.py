@@ -0,0 +1,146 @@
+"""
+Model, prompt, answer parsing and game sessions of the turn server.
+Shared by the Flask server (main.py) and the async one (async_main.py); importing
+it builds no app, no thread and no model (see get_model).
+"""
+
+import os
+import sys
+import time
+import threading
+from langchain.schema import SystemMessage
+from dotenv import load_dotenv
+from sessions import SessionStore, SessionNotFound
+import metrics
+
+# The JSON answer format and its validator are the game's (pygame_version/structured_output.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pygame_version'))
+from structured_output import JSON_MODE_INSTRUCTIONS, read_json_decision
+
+# Load env variables
+load_dotenv()
+
+# Answer format: "text" (THOUGHTS/ACTION lines) or "json_object"
+response_format = os.getenv('RESPONSE_FORMAT', 'text')
+
+# Prompt of the model, next to this file so the server can start from any directory
+SYSTEM_MESSAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts', 'system_message.txt')
+
+# Loaded once per process, shared by every request (see get_model and get_system_message)
+model = None
+system_message = None
+init_lock = threading.Lock()
+
+# Read the system message, with the JSON answer format if enabled
+def load_system_message():
+    with open(SYSTEM_MESSAGE_PATH, 'r') as f:
+        system_txt = f.read()
+    if response_format == 'json_object':
+        system_txt += JSON_MODE_INSTRUCTIONS
+    return SystemMessage(content=(system_txt))
+
+# Get the system message, loaded on first use
+def get_system_message():
+    global system_message
+    if system_message is None:
+        with init_lock:
+            if system_message is None:
+                system_message = load_system_message()
+    return system_message
+
+# Get the model, built on the first request so that importing (and forking) the server stays cheap
+def get_model():
+    global model
+    if model is None:
+        with init_lock:
+            if model is None:
+                # Imported here, loading langchain's OpenAI client is the slow part of the start-up
+                from langchain.chat_models import ChatOpenAI
+                model = ChatOpenAI(
+                    client="openai", 
+                    #model="gpt-3.5-turbo", 
+                    model="gpt-4", 
+                    temperature=0.7,
+                    openai_api_key=os.getenv('OPENAI_API_KEY'),
+                    openai_api_base=os.getenv('OPENAI_API_BASE') or None,
+                    model_kwargs={'response_format': {'type': 'json_object'}} if response_format == 'json_object' else {},
+                )
+    return model
+
+# Build the model and load the prompt ahead of the first request
+def warm_up():
+    start = time.perf_counter()
+    get_system_message()
+    get_model()
+    return time.perf_counter() - start
+
+
+
+# Last unparsable answers, shown on /metrics/unparsable
+unparsable_responses = metrics.ResponseRing(int(os.getenv('UNPARSABLE_RING_SIZE', '50')))
+
+# Count an unparsable answer and keep it for debugging
+def record_unparsable(content, reason):
+    metrics.parse_failures_total.inc()
+    unparsable_responses.add(content, reason)
+
+# Parse the response into thoughts and action
+def read_answer(response):
+    message = response.content
+    if response_format == 'json_object':
+        try:
+            return read_json_decision(message)
+        except ValueError as e:
+            record_unparsable(message, f'{type(e).__name__}: {e}')
+            return "", ""
+    try:
+        lines = message.split('\n')
+        thoughts = [l for l in lines if l.startswith('THOUGHTS: ')][0][10:]
+        action = [l for l in lines if l.startswith('ACTION: ')][0][8:]
+        return thoughts, action
+    except:
+        record_unparsable(message, 'Missing THOUGHTS or ACTION line')
+        return "", ""
+
+
+
+# Maximum number of states in a /play_turns request
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '64'))
+
+# Micro-batching: model calls arriving within MICRO_BATCH_WAIT_MS are generated together (0 to disable)
+MICRO_BATCH_SIZE = int(os.getenv('MICRO_BATCH_SIZE', '8'))
+MICRO_BATCH_WAIT_MS = float(os.getenv('MICRO_BATCH_WAIT_MS', '0'))
+
+# Game sessions, so clients can send state deltas
+sessions = SessionStore(
+    max_sessions=int(os.getenv('MAX_SESSIONS', '1000')),
+    ttl=float(os.getenv('SESSION_TTL', '3600')),
+)
+
+# A request the servers must refuse, with its HTTP status
+class RequestError(Exception):
+    def __init__(self, status, description):
+        super().__init__(description)
+        self.status = status
+        self.description = description
+
+# Get the agent state of a /play_one_turn request: sent in full, or as a session delta
+def read_state(data):
+    if data and 'state' in data:
+        return data['state']
+    if not (data and 'session_id' in data and 'agent_id' in data):
+        raise RequestError(400, 'Missing state parameter')
+    try:
+        return sessions.update(data['session_id'], data['agent_id'], data.get('delta', {}))
+    except SessionNotFound:
+        raise RequestError(404, 'Unknown or expired session')
+    except (ValueError, TypeError, AttributeError):
+        raise RequestError(400, 'Invalid delta')
+
+# Check the body of a /play_turns request, and return its states
+def read_batch(data):
+    if not (data and isinstance(data.get('states'), list)):
+        raise RequestError(400, 'Missing states parameter')
+    if len(data['states']) > MAX_BATCH_SIZE:
+        raise RequestError(413, f'Too many states (max {MAX_BATCH_SIZE})')
+    return data['states']
@@ -7,6 +7,8 @@ Manages action execution and animation triggering.
 from constants import *
 from agents import Agent, Target
 from utils import astar_pathfinding
+from structured_output import StructuredAction
+import re
 import time
 
 
@@ -326,28 +328,27 @@ class SpeakAction(Action):
             agent.stats['speaks_count'] += 1
 
 
-def parse_action_string(action_string, agent_id, game_state):
+# Action string formats, compiled once
+MOVE_PATTERN = re.compile(r'"?MOVE\s*\[(-?\d+),\s*(-?\d+)\]"?')
+ATTACK_PATTERN = re.compile(r'ATTACK\s*\[(-?\d+),\s*(-?\d+)\]')
+SPEAK_PATTERN = re.compile(r'SPEAK\s*\[(-?\d+),\s*(-?\d+)\]\s*(.+)')
+
+
+def create_action(action_type, agent_id, target_position, game_state, message=None):
     """
-    Parse an action string from the AI and create an Action object.
+    Create an Action object from its parsed fields.
     
     Args:
-        action_string (str): Action string like "MOVE [3, 5]" or "SPEAK [1, 2] Hello!"
+        action_type (str): 'MOVE', 'ATTACK' or 'SPEAK'
         agent_id (str): ID of the agent performing the action
+        target_position (list): Target position [x, y]
         game_state: The game state object
+        message (str): Message content (SPEAK only)
     
     Returns:
-        Action: The created action object, or None if parsing fails
+        Action: The created action object, or None if the action is invalid
     """
-    import re
-    
-    action_string = action_string.strip()
-    
-    # Parse MOVE action: "MOVE [x, y]"
-    move_match = re.match(r'"?MOVE\s*\[(-?\d+),\s*(-?\d+)\]"?', action_string)
-    if move_match:
-        x, y = int(move_match.group(1)), int(move_match.group(2))
-        target_position = [x, y]
-        
+    if action_type == 'MOVE':
         # Check if target position is occupied (but ignore bonuses)
         entity = game_state.get_entity_at_position(target_position)
         if entity and getattr(entity, 'kind', '') != 'bonus':
@@ -371,25 +372,100 @@ def parse_action_string(action_string, agent_id, game_state):
         
         return MoveAction(agent_id, target_position, path)
     
+    if action_type == 'ATTACK':
+        return AttackAction(agent_id, target_position)
+    
+    if action_type == 'SPEAK':
+        return SpeakAction(agent_id, target_position, message)
+    
+    # WAIT or unknown action
+    return None
+
+
+def parse_action_string(action_string, agent_id, game_state):
+    """
+    Parse an action string from the AI and create an Action object.
+    
+    Args:
+        action_string (str): Action string like "MOVE [3, 5]" or "SPEAK [1, 2] Hello!"
+        agent_id (str): ID of the agent performing the action
+        game_state: The game state object
+    
+    Returns:
+        Action: The created action object, or None if parsing fails
+    """
+    action_string = action_string.strip()
+    
+    # Parse MOVE action: "MOVE [x, y]"
+    move_match = MOVE_PATTERN.match(action_string)
+    if move_match:
+        x, y = int(move_match.group(1)), int(move_match.group(2))
+        return create_action('MOVE', agent_id, [x, y], game_state)
+    
     # Parse ATTACK action: "ATTACK [x, y]"
-    attack_match = re.match(r'ATTACK\s*\[(-?\d+),\s*(-?\d+)\]', action_string)
+    attack_match = ATTACK_PATTERN.match(action_string)
     if attack_match:
         x, y = int(attack_match.group(1)), int(attack_match.group(2))
-        target_position = [x, y]
-        return AttackAction(agent_id, target_position)
+        return create_action('ATTACK', agent_id, [x, y], game_state)
     
     # Parse SPEAK action: "SPEAK [x, y] message"
-    speak_match = re.match(r'SPEAK\s*\[(-?\d+),\s*(-?\d+)\]\s*(.+)', action_string)
+    speak_match = SPEAK_PATTERN.match(action_string)
     if speak_match:
         x, y = int(speak_match.group(1)), int(speak_match.group(2))
         message = speak_match.group(3).strip()
-        target_position = [x, y]
-        return SpeakAction(agent_id, target_position, message)
+        return create_action('SPEAK', agent_id, [x, y], game_state, message)
     
     # No valid action found
     return None
 
 
+def build_action(action, agent_id, game_state):
+    """
+    Create an Action object from an AI decision.
+    Actions parsed from a JSON answer (StructuredAction) already carry their
+    fields and skip the string parsing.
+    
+    Args:
+        action (str): Action string, or StructuredAction
+        agent_id (str): ID of the agent performing the action
+        game_state: The game state object
+    
+    Returns:
+        Action: The created action object, or None if the action is invalid
+    """
+    if isinstance(action, StructuredAction):
+        return create_action(action.action_type, agent_id, action.position, game_state, action.message)
+    return parse_action_string(action, agent_id, game_state)
+
+
+def resolve_action(action, game_state):
+    """
+    Apply the final effects of an action to the game state.
+    Used when an animation completes, and to simulate an action ahead of time.
+    
+    Args:
+        action (Action): The action to resolve
+        game_state: The game state object
+    """
+    # Execute the action's effect on the game state
+    action.execute(game_state)
+    
+    # Identify the agent
+    acting_agent = game_state.get_agent_by_id(action.agent_id)
+    
+    # Final check for bonus activation (in case it wasn't triggered during update, e.g. start/end same?)
+    if action.action_type == 'MOVE' and acting_agent and acting_agent.is_alive():
+        game_state.check_bonus_activation(acting_agent)
+    
+    # Update sight for the agent that just acted
+    from utils import compute_sight, compute_last_positions_seen
+    if acting_agent and acting_agent.is_alive():
+        acting_agent.sight = compute_sight(acting_agent, game_state.agents, game_state.targets, game_state.obstacles, game_state.bonus_malus)
+        acting_agent.last_pos_seen = compute_last_positions_seen(acting_agent, game_state.turn['current'])
+    
+    game_state.mark_changed()
+
+
 class ActionQueue:
     """
     Manages a queue of actions to be executed sequentially.
@@ -434,20 +510,7 @@ class ActionQueue:
         # Check if current action is complete
         if self.current_action.is_complete:
             # Execute the action's effect on the game state
-            self.current_action.execute(game_state)
-            
-            # Identify the agent
-            acting_agent = game_state.get_agent_by_id(self.current_action.agent_id)
-            
-            # Final check for bonus activation (in case it wasn't triggered during update, e.g. start/end same?)
-            if self.current_action.action_type == 'MOVE' and acting_agent and acting_agent.is_alive():
-                game_state.check_bonus_activation(acting_agent)
-            
-            # Update sight for the agent that just acted
-            from utils import compute_sight, compute_last_positions_seen
-            if acting_agent and acting_agent.is_alive():
-                acting_agent.sight = compute_sight(acting_agent, game_state.agents, game_state.targets, game_state.obstacles, game_state.bonus_malus)
-                acting_agent.last_pos_seen = compute_last_positions_seen(acting_agent, game_state.turn['current'])
+            resolve_action(self.current_action, game_state)
 
             self.current_action = None
             return True
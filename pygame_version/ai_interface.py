@@ -3,53 +3,142 @@ AI Interface module for BattleFieldAgents game.
 Handles communication with the AI API to get agent decisions.
 """
 
-from bfa.core.constants import *
-from bfa.utils.utils import format_agent_state, get_possible_moves, distance, has_line_of_sight
+from constants import *
+from utils import format_agent_state, get_possible_moves, distance, has_line_of_sight, is_action_legal
+from utils import compute_sight, compute_last_positions_seen
 import requests
+import copy
 import json
 import random
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from ai_metrics import AIMetrics
+from decision_cache import DecisionCache
+from decision_policy import DecisionPolicy
+from endpoint_pool import get_endpoint_pool
+from structured_output import JSON_MODE_INSTRUCTIONS, parse_json_decision, response_format_payload
+from memory import make_memory_policy
+from state_encoders import get_state_encoder
+from request_scheduler import AdmissionTimeout, get_shared_scheduler
 
 # Load environment variables
 load_dotenv()
 
+_system_message = None
+_system_message_lock = threading.Lock()
+
+
+def load_system_message():
+    """
+    Get the base system prompt, read from disk on first use only.
+    
+    Returns:
+        str: The content of AI_SYSTEM_MESSAGE_FILE, or a minimal prompt if it is missing
+    """
+    global _system_message
+    with _system_message_lock:
+        if _system_message is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), AI_SYSTEM_MESSAGE_FILE)
+            try:
+                with open(path, 'r') as f:
+                    _system_message = f.read()
+            except FileNotFoundError:
+                print(f"Error: {path} not found.")
+                _system_message = "You are an AI agent playing a game."
+        return _system_message
+
 class AIInterface:
     """
     Interface for communicating with the AI API.
     Sends game state and receives agent decisions (thoughts + actions).
     """
     
+    # Encoding of the state sent to the model, see state_encoders.py
+    STATE_ENCODER = AI_STATE_ENCODER
+    
+    # When streaming, stop reading the answer once the first ACTION line is complete
+    STREAM_EARLY_CUTOFF = True
+    
+    # "text" (THOUGHTS/ACTION lines), "json_object" or "json_schema" (see structured_output.py)
+    RESPONSE_FORMAT = AI_RESPONSE_FORMAT
+    
     def __init__(self, api_url="https://unpalpablely-vibronic-leonore.ngrok-free.dev/api/v1", timeout=API_TIMEOUT):
         """
         Initialize the AI interface.
         
         Args:
-            api_url (str): URL of the AI API endpoint.
+            api_url (str or list): URL of the AI API endpoint, or the URLs of
+                several replicas serving the same model (a string can list
+                them comma-separated).
             timeout (float): Request timeout in seconds.
         """
-        # Ensure the URL points to the chat completions endpoint if it's an OpenAI-compatible API
-        if not api_url.endswith("/chat/completions"):
-             self.api_url = api_url.rstrip("/") + "/chat/completions"
-        else:
-             self.api_url = api_url
+        # AI_API_URL overrides the endpoint, e.g. to use fake_llm_server.py
+        api_url = os.getenv("AI_API_URL", api_url)
+        if isinstance(api_url, str):
+            api_url = api_url.split(',')
+        
+        # Ensure the URLs point to the chat completions endpoint if it's an OpenAI-compatible API
+        urls = []
+        for url in api_url:
+            url = url.strip()
+            if not url.endswith("/chat/completions"):
+                url = url.rstrip("/") + "/chat/completions"
+            urls.append(url)
+        self.api_url = urls[0]
+        self.endpoints = get_endpoint_pool(urls)  # Routes requests over the replicas
 
         self.timeout = timeout
         self.api_key = os.getenv("API_KEY")
+        self.session = requests.Session()  # Keeps the connection alive between requests
+        self.model = AI_MODEL
+        self.temperature = AI_TEMPERATURE
+        self.memory_policy = make_memory_policy(AGENT_MEMORY_POLICY, AGENT_MEMORY_SIZE)
+        self.stream = AI_STREAMING
+        self._thread_context = threading.local()  # Stream callback and priority, per thread
+        self.scheduler = get_shared_scheduler()
+        self.game_id = None  # Set by the game, for fair scheduling between games
+        
+        # Retries and fallback when the model doesn't answer in time
+        self.decision_deadline = AI_DECISION_DEADLINE
+        self.fallback_ai = globals()[AI_FALLBACK_CLASS]() if AI_FALLBACK_CLASS else None
+        self.fallback_events = []  # One entry per decision taken by the fallback AI
+        self._retry_random = random.Random()
         self.last_response = None
         self.is_thinking = False
         
-        # Load system message
-        try:
-            with open('data/system_message.txt', 'r') as f:
-                self.system_message = f.read()
-        except FileNotFoundError:
-            print("Error: system_message.txt not found.")
-            self.system_message = "You are an AI agent playing a game."
+        # Latency, token and retry metrics of the decisions
+        self.metrics = AIMetrics()
+        
+        # Forced decisions taken without the model
+        self.policy = DecisionPolicy(AI_SHORT_CIRCUIT_RULES) if AI_SHORT_CIRCUIT_RULES else None
+        
+        # Persistent cache of model answers
+        self.cache = DecisionCache(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), AI_CACHE_DIR),
+            mode=os.getenv("AI_CACHE_MODE", AI_CACHE_MODE),
+            max_entries=AI_CACHE_MAX_ENTRIES
+        )
+        
+        # Base system message (shared, read once per process)
+        self.system_message = load_system_message()
+        
+        # State encoding, described to the model when it isn't plain JSON
+        self.encode_state, encoder_description = get_state_encoder(self.STATE_ENCODER)
+        self.system_message += encoder_description
+        
+        # Structured answers
+        if self.RESPONSE_FORMAT != "text":
+            self.system_message += JSON_MODE_INSTRUCTIONS
     
     def get_agent_decision(self, agent, turn, game_state):
         """
         Request a decision from the AI for a specific agent.
+        Forced situations are resolved locally by the decision policy. Otherwise
+        the request is retried until AI_DECISION_DEADLINE; if no valid answer
+        arrives in time, the fallback AI decides instead.
         
         Args:
             agent (Agent): The agent that needs to make a decision
@@ -62,18 +151,249 @@ class AIInterface:
                 - action (str): The action string (e.g., "MOVE [3, 5]")
             Returns (None, None) if the request fails.
         """
+        record = AIMetrics.new_record(agent, turn)
+        start = time.perf_counter()
+        self._thread_context.record = record
         self.is_thinking = True
+        deadline = time.monotonic() + self.decision_deadline
         
         try:
-            # Format the agent's state for the API
+            # Formatted once (A* included), for the decision policy and decide()
+            with self._measure('serialize'):
+                state = format_agent_state(
+                    agent,
+                    turn,
+                    game_state.agents,
+                    game_state.targets,
+                    game_state.obstacles,
+                    self.memory_policy
+                )
+            
+            if self.policy:
+                decision = self.policy.decide(state)
+                if decision:
+                    record['short_circuit'] = record['parsed'] = True
+                    record['decision'] = time.perf_counter() - start
+                    self.metrics.add(record)
+                    return f"[auto] {decision[0]}", decision[1]
+            
+            self._thread_context.deadline = deadline
+            self._thread_context.state = state
+            thoughts, action = self.decide(agent, turn, game_state)
+        except Exception as e:
+            print(f"AI API Error: Unexpected error - {e}")
+            thoughts, action = None, None
+        finally:
+            self._thread_context.deadline = None
+            self._thread_context.record = None
+            self._thread_context.state = None
+            self.is_thinking = False
+        
+        record['decision'] = time.perf_counter() - start
+        record['parsed'] = bool(action)
+        record['fallback'] = not action and self.fallback_ai is not None
+        self.metrics.add(record)
+        
+        if action or self.fallback_ai is None:
+            return thoughts, action
+        
+        # No valid answer in time: let the local AI decide
+        reason = "deadline" if time.monotonic() >= deadline else "error"
+        self.fallback_events.append({
+            'agent': agent.id,
+            'turn': turn['current'],
+            'action_number': turn['action_count'] + 1,
+            'reason': reason
+        })
+        print(f"AI fallback ({reason}): {type(self.fallback_ai).__name__} decides for {agent.id}")
+        
+        thoughts, action = self.fallback_ai.get_agent_decision(agent, turn, game_state)
+        return f"[fallback] {thoughts}", action
+    
+    def decide(self, agent, turn, game_state):
+        """
+        Ask the model for an agent's decision (called by get_agent_decision).
+        
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+            game_state: The game state object
+        
+        Returns:
+            tuple: (thoughts, action), or (None, None) if the request fails
+        """
+        # Format the agent's state for the API
+        with self._measure('serialize'):
+            state = self._format_state(agent, turn, game_state)
+            user_content = self.encode_state(state)
+        
+        content = self._request_completion(self.system_message, user_content)
+        if content is None:
+            return None, None
+        
+        return self._parse_response(content)
+    
+    def _format_state(self, agent, turn, game_state):
+        """
+        Get the agent's state as sent to the model, with the memory policy.
+        Reuses the state get_agent_decision formatted for the current decision.
+        
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+            game_state: The game state object
+        
+        Returns:
+            dict: The formatted state (see format_agent_state)
+        """
+        state = getattr(self._thread_context, 'state', None)
+        if state is None:
             state = format_agent_state(
                 agent,
                 turn,
                 game_state.agents,
                 game_state.targets,
-                game_state.obstacles
+                game_state.obstacles,
+                self.memory_policy
             )
+        return state
+    
+    @contextmanager
+    def _measure(self, field):
+        """
+        Add the duration of a block to a timing of the current decision's metrics.
+        
+        Args:
+            field (str): Timing field, see ai_metrics.TIMING_FIELDS
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            AIMetrics.add_time(getattr(self._thread_context, 'record', None), field, time.perf_counter() - start)
+    
+    def _request_completion(self, system_message, user_content):
+        """
+        Get the model's answer to a prompt, from the cache or the API.
+        Failed requests are retried with jittered exponential backoff, as long
+        as the decision deadline allows it.
+        
+        Args:
+            system_message (str): System prompt
+            user_content (str): Serialized agent state
+        
+        Returns:
+            str: The content of the model's answer, or None if the request fails
+        """
+        record = getattr(self._thread_context, 'record', None)
+        if record is not None:
+            record['requested'] = True
+        
+        key = self.cache.make_key(system_message, self.model, self.temperature, user_content)
+        content = self.cache.get(key)
+        if content is not None:
+            if record is not None:
+                record['cached'] = record['answered'] = True
+            return content
+        
+        if self.cache.mode == "replay":
+            print("AI Cache Error: No recorded answer for this state (replay mode)")
+            return None
+        
+        deadline = getattr(self._thread_context, 'deadline', None)
+        attempt = 0
+        while True:
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    print("AI API Error: Decision deadline reached")
+                    return None
+            
+            with self._measure('request'):
+                content = self._post_completion(system_message, user_content, timeout)
+            if content is not None:
+                if record is not None:
+                    record['answered'] = True
+                self.cache.put(key, content)
+                return content
             
+            attempt += 1
+            if attempt > AI_MAX_RETRIES:
+                return None
+            if record is not None:
+                record['retries'] = attempt
+            
+            # Full jitter, on a private generator so seeded games stay reproducible
+            delay = self._retry_random.uniform(0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2 ** attempt))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                print("AI API Error: Decision deadline reached")
+                return None
+            print(f"AI API: retrying in {delay:.2f}s (attempt {attempt + 1}/{AI_MAX_RETRIES + 1})")
+            time.sleep(delay)
+    
+    def _post_completion(self, system_message, user_content, timeout):
+        """
+        Send one chat completion request, within the shared rate limits, to the
+        replica picked by the endpoint pool. Time spent waiting for admission
+        counts against the decision deadline.
+        
+        Args:
+            system_message (str): System prompt
+            user_content (str): Serialized agent state
+            timeout (float): Request timeout in seconds
+        
+        Returns:
+            str: The content of the model's answer, or None if the request fails
+        """
+        priority = getattr(self._thread_context, 'priority', 0)
+        record = getattr(self._thread_context, 'record', None)
+        deadline = getattr(self._thread_context, 'deadline', None)
+        queued = time.perf_counter()
+        try:
+            with self.scheduler.slot(self.game_id, priority, deadline):
+                AIMetrics.add_time(record, 'queue', time.perf_counter() - queued)
+                
+                # What is left of the deadline once admitted
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        print("AI API Error: Decision deadline reached")
+                        return None
+                
+                endpoint = self.endpoints.acquire()
+                start = time.perf_counter()
+                # Cleared by _send_completion if the replica itself fails; a 429
+                # or another 4xx is the request's fault, not the replica's
+                self._thread_context.replica_healthy = True
+                content = None
+                try:
+                    content = self._send_completion(endpoint.url, system_message, user_content, timeout)
+                finally:
+                    self.endpoints.release(endpoint, time.perf_counter() - start,
+                                           self._thread_context.replica_healthy)
+        except AdmissionTimeout:
+            AIMetrics.add_time(record, 'queue', time.perf_counter() - queued)
+            print("AI API Error: Decision deadline reached while queued")
+            return None
+        return content
+    
+    def _send_completion(self, url, system_message, user_content, timeout):
+        """
+        Send one chat completion request to a replica (called by _post_completion).
+        
+        Args:
+            url (str): Chat completions URL of the replica
+            system_message (str): System prompt
+            user_content (str): Serialized agent state
+            timeout (float): Request timeout in seconds
+        
+        Returns:
+            str: The content of the model's answer, or None if the request fails
+            (replica_healthy is cleared on the thread context on connection
+            errors, timeouts and 5xx)
+        """
+        try:
             # Prepare the request payload for OpenAI-compatible API
             headers = {
                 "Content-Type": "application/json",
@@ -81,73 +401,176 @@ class AIInterface:
             }
             
             payload = {
-                "model": "qwen/qwen3-30b-a3b-2507:2", 
+                "model": self.model,
                 "messages": [
-                    {"role": "system", "content": self.system_message},
-                    {"role": "user", "content": json.dumps(state)}
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": user_content}
                 ],
-                "temperature": 0.2
+                "temperature": self.temperature
             }
 
+            if self.stream:
+                payload["stream"] = True
+                # Token counts come in a last chunk (not read after an early cutoff)
+                payload["stream_options"] = {"include_usage": True}
+            
+            if self.RESPONSE_FORMAT != "text":
+                payload["response_format"] = response_format_payload(self.RESPONSE_FORMAT)
+
             # Send POST request to the AI API
-            response = requests.post(
-                self.api_url,
+            record = getattr(self._thread_context, 'record', None)
+            response = self.session.post(
+                url,
                 json=payload,
-                timeout=self.timeout,
-                headers=headers
+                timeout=timeout,
+                headers=headers,
+                stream=self.stream
             )
             
+            # Time until the response headers were parsed (connection included)
+            if record is not None:
+                record['ttfb'] = response.elapsed.total_seconds()
+                record['request_bytes'] = (record['request_bytes'] or 0) + len(response.request.body or b'')
+            
+            # Rate limited: hold every request of the process for a while
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After", "")
+                self.scheduler.throttle(float(retry_after) if retry_after.isdigit() else AI_RATE_LIMIT_RETRY_AFTER)
+                print("AI API Error: Rate limited (429)")
+                return None
+            
             # Check if request was successful
             if response.status_code != 200:
+                if response.status_code >= 500:
+                    self._thread_context.replica_healthy = False
                 print(f"AI API Error: Status code {response.status_code} - {response.text}")
-                self.is_thinking = False
-                return None, None
+                return None
+            
+            if self.stream:
+                return self._read_stream(response)
             
             # Parse the response
             data = response.json()
             
             if 'choices' in data and len(data['choices']) > 0:
-                content = data['choices'][0]['message']['content']
-                thoughts, action = self._parse_response(content)
-                
                 self.last_response = data
-                self.is_thinking = False
-                return thoughts, action
+                self._record_usage(data)
+                return data['choices'][0]['message']['content']
             else:
                 print("AI API Error: Unexpected response format")
-                self.is_thinking = False
-                return None, None
+                return None
         
         except requests.exceptions.Timeout:
+            self._thread_context.replica_healthy = False
             print("AI API Error: Request timed out")
-            self.is_thinking = False
-            return None, None
+            return None
         
         except requests.exceptions.ConnectionError:
+            self._thread_context.replica_healthy = False
             print("AI API Error: Could not connect to server")
-            print(f"Make sure the API is running at {self.api_url}")
-            self.is_thinking = False
-            return None, None
+            print(f"Make sure the API is running at {url}")
+            return None
         
         except requests.exceptions.RequestException as e:
             print(f"AI API Error: {e}")
-            self.is_thinking = False
-            return None, None
+            return None
         
         except json.JSONDecodeError:
             print("AI API Error: Invalid JSON response")
-            self.is_thinking = False
-            return None, None
-        
-        except Exception as e:
-            print(f"AI API Error: Unexpected error - {e}")
-            self.is_thinking = False
-            return None, None
+            return None
 
+    def _record_usage(self, data):
+        """
+        Copy the token counts of a response to the current decision's metrics.
+        
+        Args:
+            data (dict): Response (or final stream chunk) holding a 'usage' field
+        """
+        record = getattr(self._thread_context, 'record', None)
+        usage = data.get('usage')
+        if record is not None and usage:
+            record['prompt_tokens'] = usage.get('prompt_tokens')
+            record['completion_tokens'] = usage.get('completion_tokens')
+    
+    def set_request_priority(self, priority):
+        """
+        Set the scheduling priority of the requests of the calling thread.
+        
+        Args:
+            priority (int): Higher priorities are served first (default 0)
+        """
+        self._thread_context.priority = priority
+    
+    def listen_stream(self, callback):
+        """
+        Receive the partial answers streamed for the requests of the calling thread.
+        
+        Args:
+            callback (callable): Called with the answer received so far, or None to stop listening
+        """
+        self._thread_context.callback = callback
+    
+    def _read_stream(self, response):
+        """
+        Read a streamed (server-sent events) completion.
+        With STREAM_EARLY_CUTOFF, the stream is closed as soon as a complete
+        'ACTION: ' line has been received. The request timeout only bounds each
+        read, so the decision deadline is checked between chunks.
+        
+        Args:
+            response (requests.Response): The streamed response
+        
+        Returns:
+            str: The content received, or None if the stream is malformed or
+            the decision deadline is reached before it ends
+        """
+        callback = getattr(self._thread_context, 'callback', None)
+        deadline = getattr(self._thread_context, 'deadline', None)
+        content = ""
+        
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if deadline is not None and time.monotonic() >= deadline:
+                    print("AI API Error: Decision deadline reached while streaming")
+                    return None
+                
+                if not line or not line.startswith('data:'):
+                    continue  # Keep-alive or comment
+                
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                
+                chunk = json.loads(data)
+                self._record_usage(chunk)
+                if not chunk.get('choices'):
+                    continue
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if not delta:
+                    continue
+                
+                content += delta
+                self.last_response = chunk
+                if callback:
+                    callback(content)
+                
+                # An ACTION line is complete once it is followed by a newline
+                if self.STREAM_EARLY_CUTOFF and '\n' in delta:
+                    complete_lines = content.split('\n')[:-1]
+                    if any(l.startswith('ACTION: ') for l in complete_lines):
+                        break
+        finally:
+            response.close()
+        
+        return content
+    
     def _parse_response(self, content):
         """
         Parse the content string to extract thoughts and action.
         """
+        if self.RESPONSE_FORMAT != "text":
+            return parse_json_decision(content)
+        
         thoughts = ""
         action = ""
         try:
@@ -169,22 +592,433 @@ class AIInterface:
     
     def check_api_connection(self):
         """
-        Check if the API is reachable.
+        Check if the API is reachable (on at least one replica).
         
         Returns:
             bool: True if API is accessible, False otherwise
         """
-        try:
-            # Try to connect to a models endpoint or similar to check availability
-            # Since we don't know if /models is available on the private API, 
-            # we'll assume it's up if we can reach the base URL or just skip this check strictly.
-            # But for good measure let's try a simple GET to the base URL
-            test_url = self.api_url.replace('/chat/completions', '')
-            response = requests.get(test_url, timeout=5)
-            # Accept any response that indicates the server is there (even 404/401 is better than connection error)
-            return True
-        except:
-            return False
+        # Try to connect to a models endpoint or similar to check availability
+        # Since we don't know if /models is available on the private API, 
+        # we'll assume it's up if we can reach the base URL or just skip this check strictly.
+        # But for good measure let's try a simple GET to the base URL
+        for url in self.endpoints.urls:
+            try:
+                test_url = url.replace('/chat/completions', '')
+                response = requests.get(test_url, timeout=5)
+                # Accept any response that indicates the server is there (even 404/401 is better than connection error)
+                return True
+            except:
+                continue
+        return False
+
+
+class PlanningAIInterface(AIInterface):
+    """
+    AI interface planning a whole turn in one request.
+    The model answers with up to NB_ACTIONS_PER_TURN actions; each planned action
+    is checked against the updated state when its turn comes, and the model is
+    queried again only when a planned action has become illegal.
+    """
+    
+    PLANNING_INSTRUCTIONS = (
+        "\n\nPLANNING MODE: plan all your remaining actions for this turn at once "
+        "('actionsLeft' in your state). Answer with one 'THOUGHTS: ' line, followed by "
+        "one 'ACTION: ' line per action, in the order they must be played. "
+        "Actions are played one after the other: plan moves from the position you will "
+        "be at after the previous actions."
+    )
+    
+    # The answer holds several ACTION lines
+    STREAM_EARLY_CUTOFF = False
+    RESPONSE_FORMAT = "text"
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize the planning AI interface (same arguments as AIInterface)."""
+        super().__init__(*args, **kwargs)
+        self.planning_system_message = self.system_message + self.PLANNING_INSTRUCTIONS
+        # agent_id -> {'turn': turn number, 'actions': {action_count: (thoughts, action)}}
+        self.plans = {}
+    
+    def decide(self, agent, turn, game_state):
+        """
+        Get the next action of an agent, from its plan when possible.
+        
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+            game_state: The game state object
+        
+        Returns:
+            tuple: (thoughts, action), or (None, None) if the request fails
+        """
+        with self._measure('serialize'):
+            state = self._format_state(agent, turn, game_state)
+        
+        # Play the planned action if it's still legal
+        planned = self._planned_action(agent.id, turn, state)
+        if planned:
+            return planned
+        
+        # No plan, or the plan is broken: plan the remaining actions again
+        with self._measure('serialize'):
+            user_content = self.encode_state(state)
+        content = self._request_completion(self.planning_system_message, user_content)
+        if content is None:
+            return None, None
+        
+        thoughts, actions = self._parse_plan(content)
+        if not actions:
+            return thoughts, ""
+        
+        self._store_plan(agent.id, turn, state, thoughts, actions)
+        return thoughts, actions[0]
+    
+    def _planned_action(self, agent_id, turn, state):
+        """
+        Get the planned action of an agent if it is still legal, and drop
+        the plan otherwise.
+        
+        Args:
+            agent_id (str): The agent
+            turn (dict): Current turn information
+            state (dict): The agent's formatted state
+        
+        Returns:
+            tuple: (thoughts, action), or None if the agent must plan again
+        """
+        plan = self.plans.get(agent_id)
+        if plan and plan['turn'] == turn['current']:
+            planned = plan['actions'].get(turn['action_count'])
+            if planned and is_action_legal(planned[1], state):
+                return planned
+        self.plans.pop(agent_id, None)
+        return None
+    
+    def _store_plan(self, agent_id, turn, state, thoughts, actions):
+        """
+        Keep the actions planned for an agent, from the action it is about to play.
+        
+        Args:
+            agent_id (str): The agent
+            turn (dict): Turn information of the planned actions
+            state (dict): The agent's formatted state ('actionsLeft' bounds the plan)
+            thoughts (str): Reasoning of the plan
+            actions (list): Planned actions, in playing order
+        """
+        self.plans[agent_id] = {
+            'turn': turn['current'],
+            'actions': {
+                turn['action_count'] + i: (thoughts, action)
+                for i, action in enumerate(actions[:state['actionsLeft']])
+            }
+        }
+    
+    def _parse_plan(self, content):
+        """
+        Parse a planning answer into thoughts and a list of actions.
+        
+        Returns:
+            tuple: (thoughts, actions) with actions in playing order
+        """
+        thoughts, _ = self._parse_response(content)
+        actions = [
+            l[8:].strip() for l in content.split('\n')
+            if l.startswith('ACTION: ') and l[8:].strip()
+        ]
+        return thoughts, actions
+
+
+class TeamBatchAIInterface(PlanningAIInterface):
+    """
+    AI interface planning the turns of all the agents of a team in one request.
+    The states of the alive teammates without a plan are sent together, and the
+    answer is split back into one plan per agent. As in PlanningAIInterface,
+    each planned action is checked against the updated state when its turn
+    comes; a broken plan is requested again for that agent only, and the other
+    teammates keep theirs.
+    """
+    
+    BATCH_INSTRUCTIONS = (
+        "\n\nTEAM MODE: you receive the states of agents of your team, each one preceded "
+        "by an 'AGENT: <id>' line. Plan the remaining actions of every agent for its turn "
+        "('actionsLeft' in its state). For each agent, answer with an 'AGENT: <id>' line, "
+        "followed by its own 'THOUGHTS: ' line and one 'ACTION: ' line per action, in the "
+        "order they must be played. Plan moves from the position the agent will be at "
+        "after its previous actions."
+    )
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize the team batch AI interface (same arguments as AIInterface)."""
+        super().__init__(*args, **kwargs)
+        self.batch_system_message = self.system_message + self.BATCH_INSTRUCTIONS
+    
+    def decide(self, agent, turn, game_state):
+        """
+        Get the next action of an agent from its plan, planning the turns of the
+        teammates without a plan in the same request if needed.
+        
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+            game_state: The game state object
+        
+        Returns:
+            tuple: (thoughts, action), or (None, None) if the request fails
+        """
+        with self._measure('serialize'):
+            state = self._format_state(agent, turn, game_state)
+        
+        planned = self._planned_action(agent.id, turn, state)
+        if planned:
+            return planned
+        
+        with self._measure('serialize'):
+            team = self._team_states(agent, turn, game_state)
+            user_content = self._encode_team({agent_id: s for agent_id, (_, s) in team.items()})
+        content = self._request_completion(self.batch_system_message, user_content)
+        if content is None:
+            return None, None
+        
+        for agent_id, (thoughts, actions) in self._parse_batch(content).items():
+            if agent_id in team and actions:
+                self._store_plan(agent_id, *team[agent_id], thoughts, actions)
+        
+        plan = self.plans.get(agent.id)
+        if not plan:
+            print(f"AI API Error: No plan for {agent.id} in the team answer")
+            return None, None
+        return plan['actions'][turn['action_count']]
+    
+    def _team_states(self, agent, turn, game_state):
+        """
+        Format the states of the agent and of its alive teammates without a
+        plan for their next turn. Teammates are shown as they will see the
+        board when their turn starts.
+        
+        Returns:
+            dict: agent_id -> (turn, formatted state)
+        """
+        team = {agent.id: (turn, self._format_state(agent, turn, game_state))}
+        
+        order = turn['order']
+        current_index = order.index(agent.id) if agent.id in order else 0
+        
+        for mate in game_state.agents:
+            if mate.team != agent.team or mate.id == agent.id or not mate.is_alive():
+                continue
+            
+            # The turn number increases if the teammate plays after a full cycle
+            mate_index = order.index(mate.id) if mate.id in order else 0
+            mate_turn = dict(turn, agent_id=mate.id, action_count=0)
+            if mate_index <= current_index:
+                mate_turn['current'] = turn['current'] + 1
+            
+            # Teammates keep the plan made for their next turn
+            plan = self.plans.get(mate.id)
+            if plan and plan['turn'] == mate_turn['current']:
+                continue
+            
+            # Same sight refresh as GameState.next_turn, on a copy
+            view = copy.copy(mate)
+            view.sight = compute_sight(view, game_state.agents, game_state.targets, game_state.obstacles, game_state.bonus_malus)
+            view.last_pos_seen = compute_last_positions_seen(view, mate_turn['current'])
+            
+            team[mate.id] = (mate_turn, format_agent_state(
+                view, mate_turn, game_state.agents, game_state.targets, game_state.obstacles,
+                self.memory_policy
+            ))
+        
+        return team
+    
+    def _encode_team(self, states):
+        """
+        Encode the states of a team, one 'AGENT: <id>' block per agent.
+        
+        Returns:
+            str: The serialized team state
+        """
+        return '\n'.join(
+            f"AGENT: {agent_id}\n{self.encode_state(state)}"
+            for agent_id, state in states.items()
+        )
+    
+    def _parse_batch(self, content):
+        """
+        Split a team answer into per-agent plans.
+        
+        Returns:
+            dict: agent_id -> (thoughts, actions)
+        """
+        blocks = {}
+        agent_id = None
+        for line in content.split('\n'):
+            if line.startswith('AGENT: '):
+                agent_id = line[7:].strip()
+                blocks[agent_id] = []
+            elif agent_id is not None:
+                blocks[agent_id].append(line)
+        
+        return {
+            agent_id: self._parse_plan('\n'.join(lines))
+            for agent_id, lines in blocks.items()
+        }
+
+
+class TurnServerAIInterface(AIInterface):
+    """
+    AI interface going through the API turn server (api/main.py) instead of
+    calling the model directly. It opens a game session on the server, then
+    each request only sends what changed in the agent's state since its
+    previous request, so request bodies don't grow with the historic.
+    """
+    
+    # State fields the agents only append to
+    APPEND_FIELDS = ('historic', 'messages')
+    
+    def __init__(self, api_url=API_URL, timeout=API_TIMEOUT):
+        """
+        Initialize the turn server AI interface.
+        
+        Args:
+            api_url (str): URL of the server's /play_one_turn route
+                (overridden by the TURN_SERVER_URL environment variable)
+            timeout (float): Request timeout in seconds.
+        """
+        super().__init__(timeout=timeout)
+        self.memory_policy = None  # The server keeps the full state
+        self.turn_url = os.getenv("TURN_SERVER_URL", api_url)
+        self.model = f"turn server at {self.turn_url}"  # The server picks the model
+        self.sessions_url = self.turn_url.rsplit('/', 1)[0] + '/sessions'
+        self.session_id = None
+        self.sent_states = {}  # agent_id -> state as last sent to the server
+        self._session_lock = threading.Lock()
+        self._agent_locks = {}  # One request at a time per agent, to keep the deltas consistent
+    
+    def decide(self, agent, turn, game_state):
+        """
+        Send the agent's state delta to the turn server and get its decision.
+        
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+            game_state: The game state object
+        
+        Returns:
+            tuple: (thoughts, action), or (None, None) if the request fails
+        """
+        with self._measure('serialize'):
+            state = self._format_state(agent, turn, game_state)
+        
+        record = getattr(self._thread_context, 'record', None)
+        if record is not None:
+            record['requested'] = True
+        
+        with self._session_lock:
+            agent_lock = self._agent_locks.setdefault(agent.id, threading.Lock())
+        
+        with agent_lock:
+            # A second attempt is made with a new session if the server lost ours
+            for attempt in range(2):
+                if record is not None:
+                    record['retries'] = attempt
+                session_id = self._open_session()
+                if session_id is None:
+                    return None, None
+                
+                body = {
+                    'session_id': session_id,
+                    'agent_id': agent.id,
+                    'delta': self._make_delta(self.sent_states.get(agent.id), state)
+                }
+                priority = getattr(self._thread_context, 'priority', 0)
+                deadline = getattr(self._thread_context, 'deadline', None)
+                queued = time.perf_counter()
+                try:
+                    with self.scheduler.slot(self.game_id, priority, deadline):
+                        AIMetrics.add_time(record, 'queue', time.perf_counter() - queued)
+                        timeout = self.timeout
+                        if deadline is not None:
+                            timeout = max(0.001, min(timeout, deadline - time.monotonic()))
+                        with self._measure('request'):
+                            response = self.session.post(self.turn_url, json=body, timeout=timeout)
+                except AdmissionTimeout:
+                    AIMetrics.add_time(record, 'queue', time.perf_counter() - queued)
+                    print("Turn Server Error: Decision deadline reached while queued")
+                    return None, None  # Nothing was sent, the session is still in sync
+                except requests.exceptions.RequestException as e:
+                    print(f"Turn Server Error: {e}")
+                    self._reset_session()  # The server may or may not have applied the delta
+                    return None, None
+                
+                if record is not None:
+                    record['ttfb'] = response.elapsed.total_seconds()
+                    record['request_bytes'] = (record['request_bytes'] or 0) + len(response.request.body or b'')
+                
+                if response.status_code == 404:
+                    print("Turn Server: session expired, opening a new one")
+                    self._reset_session()
+                    continue
+                
+                if response.status_code != 200:
+                    print(f"Turn Server Error: Status code {response.status_code} - {response.text}")
+                    self._reset_session()
+                    return None, None
+                
+                self.sent_states[agent.id] = copy.deepcopy(state)
+                data = response.json()
+                if record is not None:
+                    record['answered'] = True
+                return data.get('thoughts', ""), data.get('action', "")
+        
+        return None, None
+    
+    def _open_session(self):
+        """
+        Get the current session, opening one on the server if needed.
+        
+        Returns:
+            str: The session ID, or None if the server can't be reached
+        """
+        with self._session_lock:
+            if self.session_id is None:
+                try:
+                    response = self.session.post(self.sessions_url, timeout=self.timeout)
+                    response.raise_for_status()
+                    self.session_id = response.json()['session_id']
+                    self.sent_states = {}
+                except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                    print(f"Turn Server Error: Could not open a session - {e}")
+            return self.session_id
+    
+    def _reset_session(self):
+        """Forget the session: the next request opens a new one and sends full states."""
+        with self._session_lock:
+            self.session_id = None
+            self.sent_states = {}
+    
+    def _make_delta(self, previous, state):
+        """
+        Compute the changes between the state last sent and the current one.
+        
+        Args:
+            previous (dict): State last sent for this agent, or None
+            state (dict): Current formatted state
+        
+        Returns:
+            dict: {"set": {...}, "append": {...}} (see api/sessions.py)
+        """
+        if previous is None:
+            return {'set': state}
+        
+        delta = {'set': {}, 'append': {}}
+        for field, value in state.items():
+            old = previous.get(field)
+            if field in self.APPEND_FIELDS and isinstance(old, list) and value[:len(old)] == old:
+                if len(value) > len(old):
+                    delta['append'][field] = value[len(old):]
+            elif value != old:
+                delta['set'][field] = value
+        return delta
 
 
 class MockAIInterface(AIInterface):
@@ -199,6 +1033,10 @@ class MockAIInterface(AIInterface):
         self.api_url = "MOCK"
         self.timeout = 0
         self.api_key = "MOCK"
+        self.model = "MOCK"
+        self.temperature = 0
+        self.stream = False
+        self._thread_context = threading.local()
         self.system_message = ""
         self.last_response = None
         self.is_thinking = False
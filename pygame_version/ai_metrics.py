@@ -0,0 +1,260 @@
+"""
+AI metrics module for BattleFieldAgents.
+Records where the time of each AI decision goes (state serialization, waiting
+for the scheduler, time to first byte, total request time) along with token
+counts, request sizes, retries and parse success, to compare models and state encoders on
+real latency percentiles.
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from constants import *
+
+# Upper bounds (in seconds) of the histogram buckets, the last one is open-ended
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0]
+
+# Timings recorded for each decision, in seconds
+TIMING_FIELDS = ['serialize', 'queue', 'ttfb', 'request', 'decision']
+
+
+class RollingHistogram:
+    """
+    Latency histogram over the last samples only, so it follows the current
+    conditions (model, load) rather than the whole session.
+    """
+
+    def __init__(self, window=AI_METRICS_WINDOW, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            window (int): Number of samples kept
+            buckets (list): Upper bounds of the buckets, in increasing order
+        """
+        self.buckets = buckets
+        self.samples = deque(maxlen=window)
+        self.counts = [0] * (len(buckets) + 1)
+
+    def add(self, value):
+        """
+        Record a sample.
+
+        Args:
+            value (float): The sample, in seconds
+        """
+        if len(self.samples) == self.samples.maxlen:
+            self.counts[bisect.bisect_left(self.buckets, self.samples[0])] -= 1
+        self.samples.append(value)
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def percentile(self, p):
+        """
+        Args:
+            p (float): Percentile, between 0 and 100
+
+        Returns:
+            float: The sample at the given percentile, or None without samples
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Sample count, percentiles and bucket counts ('le' upper bounds)
+        """
+        return {
+            'count': len(self.samples),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': {
+                str(bound): count
+                for bound, count in zip(self.buckets + ['+Inf'], self.counts)
+            }
+        }
+
+
+def summarize(records):
+    """
+    Aggregate decision records.
+
+    Args:
+        records (list): Records built by AIMetrics
+
+    Returns:
+        dict: Counts, token totals and timing percentiles
+    """
+    summary = {
+        'decisions': len(records),
+        'requests': sum(1 for r in records if r['requested']),
+        'cached': sum(1 for r in records if r['cached']),
+        'retries': sum(r['retries'] for r in records),
+        'parse_failures': sum(1 for r in records if r['answered'] and not r['parsed']),
+        'fallbacks': sum(1 for r in records if r['fallback']),
+        'short_circuits': sum(1 for r in records if r['short_circuit']),
+        'prompt_tokens': sum(r['prompt_tokens'] or 0 for r in records),
+        'completion_tokens': sum(r['completion_tokens'] or 0 for r in records),
+        'request_bytes': sum(r['request_bytes'] or 0 for r in records),
+    }
+    for field in TIMING_FIELDS:
+        values = sorted(r[field] for r in records if r[field] is not None)
+        if values:
+            summary[field] = {
+                'mean': sum(values) / len(values),
+                'p50': values[len(values) // 2],
+                'p90': values[min(len(values) - 1, int(len(values) * 0.9))],
+                'max': values[-1],
+            }
+    return summary
+
+
+class AIMetrics:
+    """
+    Decision metrics of one AI interface (thread-safe).
+
+    Each decision gets a record, filled by the different stages of the request
+    while it runs in its worker thread:
+        serialize: building and encoding the agent state
+        queue: waiting for the shared request scheduler
+        ttfb: from sending the request to receiving the response headers (last attempt)
+        request: time spent in the HTTP attempts, backoff between retries excluded
+        decision: the whole get_agent_decision call
+    The connect time isn't available separately: requests reuses pooled
+    connections and doesn't expose it, so it is part of ttfb.
+    """
+
+    def __init__(self, window=AI_METRICS_WINDOW, log_file=AI_METRICS_LOG):
+        """
+        Args:
+            window (int): Number of samples kept by the rolling histograms
+            log_file (str): File the per-game summaries are appended to (JSON lines), or None
+        """
+        self.histograms = {field: RollingHistogram(window) for field in TIMING_FIELDS}
+        self.records = []  # Records of the current game
+        self.log_file = log_file
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_record(agent, turn):
+        """
+        Create the record of a decision.
+
+        Args:
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Current turn information
+
+        Returns:
+            dict: Empty record, to fill and pass to add()
+        """
+        return {
+            'agent': agent.id,
+            'turn': turn['current'],
+            'action_number': turn['action_count'] + 1,
+            'serialize': None,
+            'queue': None,
+            'ttfb': None,
+            'request': None,
+            'decision': None,
+            'prompt_tokens': None,
+            'completion_tokens': None,
+            'request_bytes': None,
+            'retries': 0,
+            'requested': False,
+            'cached': False,
+            'answered': False,
+            'parsed': False,
+            'fallback': False,
+            'short_circuit': False,
+        }
+
+    @staticmethod
+    def add_time(record, field, duration):
+        """
+        Add a duration to a timing of a record (requests can take several attempts).
+
+        Args:
+            record (dict): The record, or None when metrics aren't collected
+            field (str): One of TIMING_FIELDS
+            duration (float): Duration in seconds
+        """
+        if record is not None:
+            record[field] = (record[field] or 0.0) + duration
+
+    def add(self, record):
+        """
+        Store a finished record.
+
+        Args:
+            record (dict): The record
+        """
+        with self._lock:
+            self.records.append(record)
+            for field in TIMING_FIELDS:
+                if record[field] is not None:
+                    self.histograms[field].add(record[field])
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Rolling histograms of every timing
+        """
+        with self._lock:
+            return {field: histogram.snapshot() for field, histogram in self.histograms.items()}
+
+    def end_game(self, label=""):
+        """
+        Summarize the current game and start a new one.
+        The summary is appended to the log file if there is one.
+
+        Args:
+            label (str): Name of the AI in the summary (team, model...)
+
+        Returns:
+            dict: Summary of the game, or None if no decision was recorded
+        """
+        with self._lock:
+            records, self.records = self.records, []
+        if not records:
+            return None
+
+        summary = summarize(records)
+        summary['label'] = label
+        summary['time'] = time.time()
+        if self.log_file:
+            try:
+                with open(self.log_file, 'a') as f:
+                    f.write(json.dumps(summary) + '\n')
+            except OSError as e:
+                print(f"AI Metrics Error: Could not write {self.log_file} - {e}")
+        return summary
+
+
+def format_summary(summary):
+    """
+    Format a game summary for the console.
+
+    Args:
+        summary (dict): Summary returned by AIMetrics.end_game()
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [
+        f"{summary['label']}: {summary['decisions']} decisions, {summary['requests']} requests "
+        f"({summary['cached']} cached, {summary['retries']} retries, {summary['parse_failures']} unparsable, "
+        f"{summary['fallbacks']} fallbacks, {summary['short_circuits']} decided locally), "
+        f"{summary['prompt_tokens']} prompt / "
+        f"{summary['completion_tokens']} completion tokens, {summary['request_bytes']} bytes sent"
+    ]
+    for field in TIMING_FIELDS:
+        if field in summary:
+            stats = summary[field]
+            lines.append(
+                f"  {field:>9}: mean {stats['mean'] * 1000:8.1f} ms  p50 {stats['p50'] * 1000:8.1f} ms  "
+                f"p90 {stats['p90'] * 1000:8.1f} ms  max {stats['max'] * 1000:8.1f} ms"
+            )
+    return '\n'.join(lines)
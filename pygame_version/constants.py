@@ -8,7 +8,8 @@ All game parameters can be easily modified here.
 # ============================================================================
 WINDOW_WIDTH = 1300
 WINDOW_HEIGHT = 800
-FPS = 60
+FPS = 60  # While actions animate
+IDLE_FPS = 10  # While nothing animates; input and AI answers still wake the loop at once
 
 # UI Layout
 LEFT_PANEL_WIDTH = 300
@@ -120,12 +121,67 @@ BUBBLE_MAX_HEIGHT = 150
 FONT_SIZE_TITLE = 24
 FONT_SIZE_NORMAL = 16
 FONT_SIZE_SMALL = 14
+FONT_SIZE_BANNER = 48  # Pause/manual mode banner
+FONT_SIZE_WIN_TITLE = 72
+FONT_SIZE_WIN_HINT = 36
+TEXT_CACHE_SIZE = 1024  # Rendered text surfaces kept (see text_cache.py)
+
+# Dirty-rect rendering: only the regions that changed are redrawn and pushed to the display
+DIRTY_RECT_RENDERING = True  # False redraws and flips the whole window every frame
+DIRTY_RECTS_MAX = 8  # Beyond this many regions in a frame, the whole window is redrawn
 
 # ============================================================================
 # AI/API
 # ============================================================================
 API_URL = "http://127.0.0.1:5000/play_one_turn"
 API_TIMEOUT = 15.0  # seconds
+AI_MODEL = "qwen/qwen3-30b-a3b-2507:2"
+AI_TEMPERATURE = 0.2
+AI_SPECULATIVE_PREFETCH = True  # Request the next decision while the current action animates
+AI_STREAMING = False  # Stream completions and stop reading once the ACTION line is received
+AI_STATE_ENCODER = "json"  # "json", "minified_json", "coordinates" or "ascii_map" (see state_encoders.py)
+AI_RESPONSE_FORMAT = "text"  # "text" (THOUGHTS/ACTION lines), "json_object" or "json_schema" (see structured_output.py)
+
+# Retries and fallback
+AI_DECISION_DEADLINE = 20.0  # Seconds allowed for a decision, retries included
+AI_MAX_RETRIES = 3
+AI_RETRY_BASE_DELAY = 0.5  # seconds, doubled at each retry (with full jitter)
+AI_RETRY_MAX_DELAY = 4.0  # seconds
+AI_FALLBACK_CLASS = "MockAIInterface"  # Local AI deciding when the deadline is missed (None to disable)
+
+# Forced situations decided locally, without the model (see decision_policy.py, [] to disable)
+AI_SHORT_CIRCUIT_RULES = ["no_options", "single_action", "no_moves_no_enemies", "final_target_attack"]
+
+# Shared request scheduler (all the games of the process share these limits)
+AI_RATE_LIMIT_RPS = 2.0  # Sustained requests per second allowed by the provider
+AI_RATE_LIMIT_BURST = 4  # Requests that can be sent at once after an idle period
+AI_MAX_IN_FLIGHT = 4  # Maximum concurrent requests
+AI_RATE_LIMIT_RETRY_AFTER = 5.0  # Seconds to hold requests after a 429 without Retry-After
+
+# Inference replicas (api_url, or the AI_API_URL environment variable, can list several
+# comma-separated URLs; raise AI_MAX_IN_FLIGHT with the number of replicas)
+AI_ENDPOINT_ROUTING = "least_outstanding"  # "least_outstanding" or "ewma" (see endpoint_pool.py)
+AI_ENDPOINT_EWMA_DECAY = 0.3  # Weight of the latest latency in the moving average
+AI_ENDPOINT_MAX_FAILURES = 3  # Consecutive failures before a replica is ejected
+AI_ENDPOINT_SLOW_FACTOR = 3.0  # A replica this many times slower than the fastest one is ejected
+AI_ENDPOINT_MIN_SAMPLES = 5  # Latency samples needed before comparing replicas
+AI_ENDPOINT_EJECT_TIME = 30.0  # Seconds an ejected replica receives no request
+
+# Agent memory sent to the AI: "full", "last_n" or "summary" (see memory.py)
+AGENT_MEMORY_POLICY = "full"
+AGENT_MEMORY_SIZE = 6  # Recent entries kept in full by "last_n" and "summary"
+
+# Decision cache (can be overridden with the AI_CACHE_MODE environment variable)
+AI_CACHE_MODE = "passthrough"  # "record", "replay" or "passthrough"
+AI_CACHE_DIR = ".ai_cache"  # Relative to the pygame_version directory
+AI_CACHE_MAX_ENTRIES = 5000
+
+# Base system prompt, read once per process and shared by every AI interface
+AI_SYSTEM_MESSAGE_FILE = "system_message.txt"  # Relative to the pygame_version directory
+
+# Decision metrics (see ai_metrics.py)
+AI_METRICS_WINDOW = 200  # Samples kept by the rolling latency histograms
+AI_METRICS_LOG = None  # File the per-game summaries are appended to (JSON lines), e.g. "ai_metrics.jsonl"
 
 # ============================================================================
 # DEBUG
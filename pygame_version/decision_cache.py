@@ -0,0 +1,150 @@
+"""
+Decision cache module for BattleFieldAgents.
+Stores model answers on disk, keyed by a hash of the whole prompt, so that
+reruns of a seeded game don't query the LLM again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+CACHE_MODES = ("record", "replay", "passthrough")
+
+# Share of max_entries kept when the cache overflows
+EVICTION_LOW_WATER = 0.9
+
+
+class DecisionCache:
+    """
+    Disk-backed LRU cache of model answers.
+
+    Modes:
+        - record: answer from the cache when possible, query and store otherwise
+        - replay: answer from the cache only, never query the model (offline)
+        - passthrough: the cache is not used
+
+    Attributes:
+        mode (str): One of CACHE_MODES
+        directory (str): Directory holding one JSON file per entry
+        max_entries (int): Maximum number of entries kept on disk
+    """
+
+    def __init__(self, directory, mode="record", max_entries=5000):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (str): Directory holding the cache entries (created if needed)
+            mode (str): One of CACHE_MODES
+            max_entries (int): Maximum number of entries, least recently used are evicted
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+
+        self.mode = mode
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.mode != "passthrough":
+            os.makedirs(self.directory, exist_ok=True)
+        self._count = len(self._entry_files()) if self.mode != "passthrough" else 0
+
+    @staticmethod
+    def make_key(system_message, model, temperature, user_content):
+        """
+        Hash everything that determines the model's answer.
+
+        Args:
+            system_message (str): System prompt
+            model (str): Model name
+            temperature (float): Sampling temperature
+            user_content (str): Serialized agent state
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        blob = json.dumps([system_message, model, temperature, user_content])
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached answer.
+
+        Args:
+            key (str): Request key, see make_key()
+
+        Returns:
+            str: The cached model answer, or None on a miss
+        """
+        if self.mode == "passthrough":
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                content = json.load(f)['content']
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return content
+
+    def put(self, key, content):
+        """
+        Store a model answer (only in record mode).
+
+        Args:
+            key (str): Request key, see make_key()
+            content (str): The model answer
+        """
+        if self.mode != "record":
+            return
+
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+
+        # Write atomically so concurrent games never read half an entry
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'content': content}, f)
+        os.replace(tmp_path, path)
+
+        if is_new:
+            with self._lock:
+                self._count += 1
+                if self._count > self.max_entries:
+                    self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries, down to EVICTION_LOW_WATER of
+        max_entries, so that the directory is scanned once per batch of puts
+        rather than on every put once the cache is full.
+        """
+        files = sorted(self._entry_files(), key=lambda p: os.path.getmtime(p))
+        keep = int(self.max_entries * EVICTION_LOW_WATER)
+        removed = files[:max(0, len(files) - keep)]
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._count = len(files) - len(removed)
+
+    def _entry_files(self):
+        """List the paths of all the cache entries."""
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith('.json')
+        ]
+
+    def _path(self, key):
+        """Path of the file holding an entry."""
+        return os.path.join(self.directory, f"{key}.json")
@@ -0,0 +1,93 @@
+"""
+Decision policy module for BattleFieldAgents.
+Resolves forced or rule-dominated situations locally, before asking the model:
+there is no point paying a full LLM round trip when only one outcome makes sense.
+"""
+
+from constants import *
+
+
+def _targets_of(actions, prefix):
+    """Actions of a kind, e.g. all the 'MOVE [x, y]' entries."""
+    return [a for a in actions if a.startswith(prefix)]
+
+
+def rule_no_options(state):
+    """Nothing can be done at all: wait."""
+    if not state['possibleActions']:
+        return "No possible action. Waiting.", "WAIT"
+    return None
+
+
+def rule_single_action(state):
+    """Only one move or attack is possible: play it."""
+    actions = state['possibleActions']
+    if len(actions) == 1 and not actions[0].startswith('SPEAK'):
+        return f"Only one possible action: {actions[0]}.", actions[0]
+    return None
+
+
+def rule_no_moves_no_enemies(state):
+    """Blocked with no enemy in sight: wait."""
+    actions = state['possibleActions']
+    if not _targets_of(actions, 'MOVE') and not _targets_of(actions, 'ATTACK'):
+        return "I can't move and no enemy is in sight. Waiting.", "WAIT"
+    return None
+
+
+def rule_final_target_attack(state):
+    """Last action of the turn and the enemy target can be hit: hit it."""
+    if state['actionsLeft'] != 1:
+        return None
+    for target in state['enemyTarget']:
+        action = f"ATTACK [{target['position'][0]}, {target['position'][1]}]"
+        if action in state['possibleActions']:
+            return f"Last action of my turn and the enemy target is in range at {target['position']}. Attacking!", action
+    return None
+
+
+# Rules in evaluation order
+DECISION_RULES = {
+    'no_options': rule_no_options,
+    'single_action': rule_single_action,
+    'no_moves_no_enemies': rule_no_moves_no_enemies,
+    'final_target_attack': rule_final_target_attack,
+}
+
+
+class DecisionPolicy:
+    """
+    Short-circuit layer in front of the model.
+
+    Attributes:
+        rules (list): Names of the enabled rules, see DECISION_RULES
+        hits (dict): Number of decisions taken by each rule
+    """
+
+    def __init__(self, rules=AI_SHORT_CIRCUIT_RULES):
+        """
+        Args:
+            rules (list): Names of the rules to enable, in DECISION_RULES order
+        """
+        unknown = [name for name in rules if name not in DECISION_RULES]
+        if unknown:
+            raise ValueError(f"Unknown decision rules {unknown}, expected some of {list(DECISION_RULES)}")
+        self.rules = [name for name in DECISION_RULES if name in rules]
+        self.hits = {name: 0 for name in self.rules}
+
+    def decide(self, state):
+        """
+        Resolve the decision locally if the situation is forced.
+
+        Args:
+            state (dict): Formatted agent state (see format_agent_state)
+
+        Returns:
+            tuple: (thoughts, action), or None if the model must decide
+        """
+        for name in self.rules:
+            decision = DECISION_RULES[name](state)
+            if decision:
+                self.hits[name] += 1
+                return decision
+        return None
@@ -0,0 +1,125 @@
+"""
+Decision requests module for BattleFieldAgents.
+Runs AI decision requests in the background so the game loop keeps animating
+while the AI thinks, and lets the next decision be requested speculatively.
+"""
+
+import json
+import threading
+from utils import format_agent_state
+
+
+def decision_state_key(agent, turn, game_state):
+    """
+    Build a fingerprint of everything the AI is shown for a decision.
+    Two states with the same key lead to the same request.
+
+    Args:
+        agent (Agent): The agent that needs to make a decision
+        turn (dict): Turn information
+        game_state: The game state object
+
+    Returns:
+        str: Canonical serialization of the agent's state
+    """
+    state = format_agent_state(
+        agent,
+        turn,
+        game_state.agents,
+        game_state.targets,
+        game_state.obstacles
+    )
+    return json.dumps(state, sort_keys=True)
+
+
+class PendingDecision:
+    """
+    A decision requested from an AI interface in a background thread.
+
+    Attributes:
+        agent_id (str): ID of the agent the decision is for
+        state_key (str): Fingerprint of the state the request was built from
+        thoughts (str): The agent's reasoning, once done
+        action (str): The action string, once done
+        partial_thoughts (str): Reasoning received so far, when the answer is streamed
+        error (Exception): Error raised by the AI interface, if any
+    """
+
+    def __init__(self, ai, agent, turn, game_state, state_key=None, priority=0, on_done=None):
+        """
+        Start requesting a decision.
+
+        Args:
+            ai (AIInterface): The AI interface to query
+            agent (Agent): The agent that needs to make a decision
+            turn (dict): Turn information
+            game_state: The game state the decision is based on (not mutated)
+            state_key (str): Fingerprint of the state, see decision_state_key()
+            priority (int): Scheduling priority of the request (higher first)
+            on_done (callable): Called without arguments from the worker thread
+                once the decision (or an error) is available
+        """
+        self.agent_id = agent.id
+        self.state_key = state_key
+        self.thoughts = None
+        self.action = None
+        self.partial_thoughts = None
+        self.error = None
+        self._done = threading.Event()
+        self._on_done = on_done
+
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(ai, agent, turn, game_state, priority),
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, ai, agent, turn, game_state, priority):
+        """Query the AI (worker thread)."""
+        listen_stream = getattr(ai, 'listen_stream', None)
+        try:
+            if hasattr(ai, 'set_request_priority'):
+                ai.set_request_priority(priority)
+            if listen_stream:
+                listen_stream(self._on_partial_answer)
+            self.thoughts, self.action = ai.get_agent_decision(agent, turn, game_state)
+        except Exception as e:
+            self.error = e
+        finally:
+            if listen_stream:
+                listen_stream(None)
+            self._done.set()
+            if self._on_done:
+                self._on_done()
+
+    def _on_partial_answer(self, content):
+        """Extract the reasoning from a partial streamed answer (worker thread)."""
+        for line in content.split('\n'):
+            if line.startswith('THOUGHTS: '):
+                self.partial_thoughts = line[10:]
+
+    def is_done(self):
+        """
+        Check if the AI has answered.
+
+        Returns:
+            bool: True if the decision (or an error) is available
+        """
+        return self._done.is_set()
+
+    def matches(self, agent, turn, game_state):
+        """
+        Check if this decision was computed for the given state.
+
+        Args:
+            agent (Agent): The agent about to play
+            turn (dict): Current turn information
+            game_state: The live game state
+
+        Returns:
+            bool: True if the decision can be used as is
+        """
+        if self.agent_id != agent.id or self.state_key is None:
+            return False
+        return self.state_key == decision_state_key(agent, turn, game_state)
@@ -0,0 +1,84 @@
+"""
+Dirty-rectangle tracking for BattleFieldAgents.
+Each frame, the renderer and the panels describe what they show as named items
+(a screen rectangle and a key summarizing the content). Comparing them with the
+previous frame gives the regions to redraw and to push with
+pygame.display.update(rects), instead of redrawing and flipping the whole window.
+"""
+
+import pygame
+from constants import *
+
+
+def merge_rects(rects):
+    """
+    Merge the overlapping rectangles.
+
+    Args:
+        rects (list): pygame.Rect to merge
+
+    Returns:
+        list: Rectangles covering the same regions, none overlapping another
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        # A merged rectangle can overlap ones that didn't touch its parts, so repeat
+        overlapping = rect.collidelist(merged)
+        while overlapping != -1:
+            rect.union_ip(merged.pop(overlapping))
+            overlapping = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyTracker:
+    """
+    Finds the regions of the screen whose content changed since the last frame.
+    """
+
+    def __init__(self, screen_rect, max_rects=DIRTY_RECTS_MAX):
+        """
+        Args:
+            screen_rect (pygame.Rect): The whole window
+            max_rects (int): Beyond this many regions, the whole window is redrawn
+        """
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.max_rects = max_rects
+        self.items = {}  # name -> (rect, key) shown by the last frame
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Redraw the whole window on the next frame (first frame, restart, window exposed)."""
+        self.full_redraw = True
+
+    def update(self, items):
+        """
+        Compare this frame's items with the last frame's.
+
+        Args:
+            items (dict): Item name -> (pygame.Rect, key); an item is redrawn
+                when its rectangle or key changes, appears or disappears
+
+        Returns:
+            list: Regions to redraw, clipped to the window (empty if nothing changed)
+        """
+        dirty = []
+        for name, (rect, key) in items.items():
+            previous = self.items.get(name)
+            if previous is None:
+                dirty.append(rect)
+            elif previous != (rect, key):
+                dirty += [previous[0], rect]
+        dirty += [rect for name, (rect, _) in self.items.items() if name not in items]
+        self.items = items
+
+        if self.full_redraw:
+            self.full_redraw = False
+            return [self.screen_rect.copy()]
+
+        dirty = merge_rects(self.screen_rect.clip(rect) for rect in dirty)
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        if len(dirty) > self.max_rects:
+            return [self.screen_rect.copy()]
+        return dirty
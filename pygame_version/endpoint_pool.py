@@ -0,0 +1,217 @@
+"""
+Endpoint pool module for BattleFieldAgents.
+Spreads the AI requests over several inference replicas serving the same
+model, routes each request to the least loaded one, and passively ejects the
+replicas that keep failing or are much slower than the others.
+"""
+
+import threading
+import time
+from constants import *
+
+
+class Endpoint:
+    """
+    One inference replica and its statistics.
+
+    Attributes:
+        url (str): Chat completions URL of the replica
+        outstanding (int): Requests currently sent to the replica
+        ewma_latency (float): Moving average of the request latency (None before the first sample)
+        requests (int): Requests sent
+        failures (int): Requests that failed
+        consecutive_failures (int): Failures since the last success
+        ejections (int): Number of times the replica was ejected
+        ejected_until (float): time.monotonic() at which an ejected replica is used again
+    """
+
+    def __init__(self, url):
+        """
+        Args:
+            url (str): Chat completions URL of the replica
+        """
+        self.url = url
+        self.outstanding = 0
+        self.ewma_latency = None
+        self.samples = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now):
+        """
+        Args:
+            now (float): Current time.monotonic()
+
+        Returns:
+            bool: True if the replica must not receive requests
+        """
+        return now < self.ejected_until
+
+
+class EndpointPool:
+    """
+    Routes requests over a set of replicas (thread-safe).
+
+    Routing strategies:
+        least_outstanding: fewest requests in flight, then lowest latency
+        ewma: lowest latency weighted by the requests in flight
+    Replicas without latency samples are preferred, so new or recovered
+    replicas get probed.
+    """
+
+    def __init__(self, urls, routing=AI_ENDPOINT_ROUTING):
+        """
+        Args:
+            urls (list): Chat completions URLs of the replicas
+            routing (str): "least_outstanding" or "ewma"
+        """
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one URL")
+        if routing not in ("least_outstanding", "ewma"):
+            raise ValueError(f"Unknown routing strategy '{routing}', expected 'least_outstanding' or 'ewma'")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.routing = routing
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        """List of the replica URLs."""
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _cost(self, endpoint):
+        """Routing cost of a replica, lower is better."""
+        latency = endpoint.ewma_latency or 0.0
+        if self.routing == "ewma":
+            return (latency * (endpoint.outstanding + 1), endpoint.outstanding)
+        return (endpoint.outstanding, latency)
+
+    def acquire(self):
+        """
+        Pick the replica for a request and count it as outstanding.
+        If every replica is ejected, the one coming back first is used.
+
+        Returns:
+            Endpoint: The chosen replica, to pass to release()
+        """
+        with self._lock:
+            now = time.monotonic()
+            healthy = [e for e in self.endpoints if not e.is_ejected(now)]
+            if healthy:
+                endpoint = min(healthy, key=self._cost)
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint, latency, success):
+        """
+        Report the outcome of a request, and eject the replica if it misbehaves.
+
+        Args:
+            endpoint (Endpoint): Replica returned by acquire()
+            latency (float): Duration of the request in seconds
+            success (bool): False if the replica failed (connection error,
+                timeout or 5xx); a rate-limited (429) or otherwise rejected (4xx)
+                request still counts as a success
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if not success:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= AI_ENDPOINT_MAX_FAILURES:
+                    self._eject(endpoint, f"{endpoint.consecutive_failures} consecutive failures")
+                return
+
+            endpoint.consecutive_failures = 0
+            if endpoint.ewma_latency is None:
+                endpoint.ewma_latency = latency
+            else:
+                endpoint.ewma_latency += AI_ENDPOINT_EWMA_DECAY * (latency - endpoint.ewma_latency)
+            endpoint.samples += 1
+
+            # Outlier detection against the fastest other healthy replica
+            now = time.monotonic()
+            others = [
+                e.ewma_latency for e in self.endpoints
+                if e is not endpoint and not e.is_ejected(now) and e.samples >= AI_ENDPOINT_MIN_SAMPLES
+            ]
+            if endpoint.samples >= AI_ENDPOINT_MIN_SAMPLES and others:
+                if endpoint.ewma_latency > AI_ENDPOINT_SLOW_FACTOR * min(others):
+                    self._eject(endpoint, f"latency {endpoint.ewma_latency:.2f}s vs {min(others):.2f}s")
+
+    def _eject(self, endpoint, reason):
+        """
+        Stop routing to a replica for AI_ENDPOINT_EJECT_TIME (lock held).
+        The last healthy replica is never ejected.
+        """
+        now = time.monotonic()
+        if not any(not e.is_ejected(now) for e in self.endpoints if e is not endpoint):
+            return
+        endpoint.ejected_until = now + AI_ENDPOINT_EJECT_TIME
+        endpoint.ejections += 1
+        # Probe it again from scratch when it comes back
+        endpoint.ewma_latency = None
+        endpoint.samples = 0
+        endpoint.consecutive_failures = 0
+        print(f"AI Endpoint: ejecting {endpoint.url} for {AI_ENDPOINT_EJECT_TIME:.0f}s ({reason})")
+
+    def snapshot(self):
+        """
+        Returns:
+            list: Statistics of each replica
+        """
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    'url': e.url,
+                    'requests': e.requests,
+                    'failures': e.failures,
+                    'outstanding': e.outstanding,
+                    'ewma_latency': e.ewma_latency,
+                    'ejections': e.ejections,
+                    'ejected': e.is_ejected(now),
+                }
+                for e in self.endpoints
+            ]
+
+    def format_stats(self):
+        """
+        Returns:
+            str: One line per replica, for the console
+        """
+        lines = []
+        for stats in self.snapshot():
+            latency = f"{stats['ewma_latency'] * 1000:.0f} ms" if stats['ewma_latency'] is not None else "-"
+            lines.append(
+                f"  {stats['url']}: {stats['requests']} requests, {stats['failures']} failures, "
+                f"latency {latency}, {stats['ejections']} ejections{' (ejected)' if stats['ejected'] else ''}"
+            )
+        return '\n'.join(lines)
+
+
+_endpoint_pools = {}
+_endpoint_pools_lock = threading.Lock()
+
+
+def get_endpoint_pool(urls):
+    """
+    Get the pool shared by every AI interface of the process using these replicas,
+    so that concurrent games see each other's load.
+
+    Args:
+        urls (list): Chat completions URLs of the replicas
+
+    Returns:
+        EndpointPool: The shared pool
+    """
+    key = tuple(urls)
+    with _endpoint_pools_lock:
+        if key not in _endpoint_pools:
+            _endpoint_pools[key] = EndpointPool(list(urls))
+        return _endpoint_pools[key]
@@ -0,0 +1,328 @@
+"""
+Stand-in LLM server for BattleFieldAgents.
+Serves an OpenAI-compatible /chat/completions endpoint on localhost that
+answers in the THOUGHTS:/ACTION: format using the MockAIInterface rules, with
+configurable latency, errors and streaming. Used to load-test AIInterface and
+the API server without paying for a real provider.
+
+Usage:
+    python fake_llm_server.py --port 8000 --latency-dist lognormal --latency-mean 800
+    (then point AIInterface or OPENAI_API_BASE at http://127.0.0.1:8000/v1)
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from mock_rules import decide_from_state, plan_from_state
+
+ACTION_PATTERN = re.compile(r'(?:ATTACK|MOVE) \[-?\d+, -?\d+\]')
+
+
+def decide(user_content):
+    """
+    Decide from the posted state, whatever its encoding.
+
+    Args:
+        user_content (str): Content of the user message
+
+    Returns:
+        tuple: (thoughts, action)
+    """
+    try:
+        return decide_from_state(json.loads(user_content))
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    # Text encodings (see state_encoders.py): pick from the listed actions
+    actions = ACTION_PATTERN.findall(user_content)
+    attacks = [a for a in actions if a.startswith('ATTACK')]
+    if attacks:
+        return "Enemy in sight. Attacking!", attacks[0]
+    if actions:
+        return "Moving forward.", actions[-1]
+    return "Nothing to do. Waiting.", "WAIT"
+
+
+def plan(user_content):
+    """
+    Plan the remaining actions of a turn from the posted state (planning modes).
+
+    Args:
+        user_content (str): Content of the user message
+
+    Returns:
+        tuple: (thoughts, actions)
+    """
+    try:
+        return plan_from_state(json.loads(user_content))
+    except (ValueError, KeyError, TypeError):
+        thoughts, action = decide(user_content)
+        return thoughts, [action]
+
+
+def json_answer(thoughts, action):
+    """Format a decision as the JSON object of the structured output mode."""
+    match = re.match(r'(MOVE|ATTACK|SPEAK) \[(-?\d+), (-?\d+)\]\s*(.*)', action)
+    if not match:
+        return json.dumps({"thoughts": thoughts, "action": {"type": "WAIT"}})
+    fields = {"type": match.group(1), "x": int(match.group(2)), "y": int(match.group(3))}
+    if match.group(1) == "SPEAK":
+        fields["message"] = match.group(4)
+    return json.dumps({"thoughts": thoughts, "action": fields})
+
+
+def build_answer(system_message, user_content, structured=False):
+    """
+    Build the model's answer, handling the planning modes of
+    PlanningAIInterface and TeamBatchAIInterface.
+
+    Args:
+        system_message (str): Content of the system message
+        user_content (str): Content of the user message
+        structured (bool): Answer with a JSON object (response_format requested)
+
+    Returns:
+        str: The answer content
+    """
+    if "TEAM MODE" in system_message:
+        blocks = re.split(r'^AGENT: (\S+)\n', user_content, flags=re.MULTILINE)
+        lines = []
+        for agent_id, state in zip(blocks[1::2], blocks[2::2]):
+            thoughts, actions = plan(state.strip())
+            lines += [f"AGENT: {agent_id}", f"THOUGHTS: {thoughts}"] + [f"ACTION: {a}" for a in actions]
+        return '\n'.join(lines)
+
+    if "PLANNING MODE" in system_message:
+        thoughts, actions = plan(user_content)
+        return '\n'.join([f"THOUGHTS: {thoughts}"] + [f"ACTION: {a}" for a in actions])
+
+    thoughts, action = decide(user_content)
+    if structured:
+        return json_answer(thoughts, action)
+    return f"THOUGHTS: {thoughts}\nACTION: {action}"
+
+
+class LatencyModel:
+    """Random latencies (in seconds) following a configurable distribution."""
+
+    def __init__(self, dist, mean_ms, spread_ms, seed=None):
+        """
+        Args:
+            dist (str): "constant", "uniform", "exponential" or "lognormal"
+            mean_ms (float): Mean latency in milliseconds
+            spread_ms (float): Half-width (uniform) or standard deviation (lognormal)
+            seed (int): Random seed
+        """
+        self.dist = dist
+        self.mean = mean_ms / 1000
+        self.spread = spread_ms / 1000
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self):
+        """Draw one latency in seconds."""
+        with self.lock:
+            if self.dist == "constant" or self.mean <= 0:
+                return self.mean
+            if self.dist == "uniform":
+                return max(0.0, self.random.uniform(self.mean - self.spread, self.mean + self.spread))
+            if self.dist == "exponential":
+                return self.random.expovariate(1 / self.mean)
+            if self.dist == "lognormal":
+                # Parameters of the underlying normal giving the requested mean and deviation
+                variance = self.spread ** 2
+                sigma2 = math.log(1 + variance / self.mean ** 2)
+                mu = math.log(self.mean) - sigma2 / 2
+                return self.random.lognormvariate(mu, math.sqrt(sigma2))
+            raise ValueError(f"Unknown latency distribution '{self.dist}'")
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Request handler; the configuration lives on the server object."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+        else:
+            self._send_json(200, {"status": "ok"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+            messages = payload["messages"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": {"message": "Invalid request body"}})
+            return
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        server = self.server
+        time.sleep(server.latency.sample())  # Time to first byte
+
+        # Injected failures
+        roll = server.random.random()
+        if roll < server.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "1"})
+            return
+        if roll < server.rate_limit_rate + server.error_rate:
+            self._send_json(500, {"error": {"message": "Injected server error"}})
+            return
+
+        system_message = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user_content = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        content = build_answer(system_message, user_content, "response_format" in payload)
+        if server.trailing_text and "response_format" not in payload:
+            # Models often keep generating after the answer
+            content += "\n" + server.trailing_text
+
+        model = payload.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {
+            "prompt_tokens": sum(len(m["content"]) for m in messages) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if payload.get("stream"):
+            include_usage = payload.get("stream_options", {}).get("include_usage", False)
+            self._stream(completion_id, model, content, usage if include_usage else None)
+        else:
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+    def _stream(self, completion_id, model, content, usage=None):
+        """Send the answer as server-sent events, one word per chunk, then the usage if requested."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        tokens = re.findall(r'\S+\s*|\s+', content)
+        try:
+            for token in tokens:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(self.server.token_delay)
+            if usage:
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client closed the stream early (ACTION already parsed)
+
+
+def make_server(host="127.0.0.1", port=8000, latency=None, error_rate=0.0, rate_limit_rate=0.0,
+                token_delay_ms=0.0, trailing_text="", seed=None, quiet=True):
+    """
+    Create the stand-in server (call serve_forever() to run it).
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on (0 for any free port)
+        latency (LatencyModel): Time to first byte (default: none)
+        error_rate (float): Fraction of requests answered with a 500
+        rate_limit_rate (float): Fraction of requests answered with a 429
+        token_delay_ms (float): Delay between streamed chunks
+        trailing_text (str): Text generated after the ACTION line
+        seed (int): Random seed for the injected failures
+        quiet (bool): Don't log every request
+
+    Returns:
+        ThreadingHTTPServer: The server
+    """
+    server = ThreadingHTTPServer((host, port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency or LatencyModel("constant", 0, 0)
+    server.error_rate = error_rate
+    server.rate_limit_rate = rate_limit_rate
+    server.token_delay = token_delay_ms / 1000
+    server.trailing_text = trailing_text
+    server.random = random.Random(seed)
+    server.quiet = quiet
+    return server
+
+
+def main():
+    """Entry point of the stand-in server."""
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI-compatible LLM server for BattleField Agents")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Interface to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--latency-dist', choices=["constant", "uniform", "exponential", "lognormal"], default="constant",
+                        help='Distribution of the time to first byte (default: %(default)s)')
+    parser.add_argument('--latency-mean', type=float, default=500, help='Mean time to first byte in ms (default: %(default)s)')
+    parser.add_argument('--latency-spread', type=float, default=200,
+                        help='Half-width (uniform) or standard deviation (lognormal) in ms (default: %(default)s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 500 answers (default: %(default)s)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of 429 answers (default: %(default)s)')
+    parser.add_argument('--token-delay', type=float, default=20, help='Delay between streamed words in ms (default: %(default)s)')
+    parser.add_argument('--trailing-words', type=int, default=0,
+                        help='Words generated after the ACTION line, to exercise early stream cutoff (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed (default: random)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = make_server(
+        args.host,
+        args.port,
+        latency=LatencyModel(args.latency_dist, args.latency_mean, args.latency_spread, args.seed),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        token_delay_ms=args.token_delay,
+        trailing_text=' '.join(["filler"] * args.trailing_words),
+        seed=args.seed,
+        quiet=not args.verbose
+    )
+    print(f"Stand-in LLM server listening on http://{args.host}:{server.server_address[1]}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,16 @@ Handles game initialization, updates, and win condition checking.
 
 from constants import *
 from agents import Agent, Target, Obstacle, BonusMalus
-from actions import ActionQueue
+from actions import ActionQueue, resolve_action
 from utils import compute_sight, compute_last_positions_seen, distance
+import copy
+import itertools
 import random
 
+# Source of the state versions, shared by every game state so that a restarted
+# game never reuses a version number of the previous one
+_versions = itertools.count(1)
+
 
 class GameState:
     """
@@ -41,6 +47,7 @@ class GameState:
         self.winner = None
         self.game_over = False
         self.notifications = []  # List of system messages to display
+        self.version = 0  # Changes whenever the board or the turn changes (see mark_changed)
         
         # Initialize game
         self.initialize_game()
@@ -92,6 +99,16 @@ class GameState:
         
         # Update initial sight for all agents
         self._update_all_sights()
+        self.mark_changed()
+    
+    def mark_changed(self):
+        """
+        Give the state a new version.
+        Called when positions, life points, bonuses or the turn change, so that
+        views derived from the board (e.g. the debug overlays) know when to
+        recompute. Agent messages and history don't change the version.
+        """
+        self.version = next(_versions)
     
     def _generate_symmetric_spawn_positions(self, red_target_pos, count):
         """
@@ -279,6 +296,7 @@ class GameState:
                 self._apply_bonus_effect(agent, bonus)
                 bonus.triggered = True
                 self.bonus_malus.remove(bonus)
+                self.mark_changed()
                 return
 
     def _apply_bonus_effect(self, agent, bonus):
@@ -422,6 +440,8 @@ class GameState:
         
         if self.turn['action_count'] >= NB_ACTIONS_PER_TURN:
             self.next_turn()
+        
+        self.mark_changed()
     
     def next_turn(self):
         """Move to the next agent's turn."""
@@ -452,6 +472,42 @@ class GameState:
         # No alive agents found - game over
         self.check_win_condition()
     
+    def simulate_action(self, action):
+        """
+        Compute the state that will follow an action, without animating it.
+        The live state is left untouched.
+        
+        Args:
+            action (Action): The action about to be played
+        
+        Returns:
+            GameState: A detached copy of the state once the action is resolved
+            and the turn has advanced, or None if the outcome can't be predicted
+            (a move crossing a bonus, whose effect is random) or ends the game
+        """
+        if action.action_type == 'MOVE':
+            crossed = [tuple(pos) for pos in action.params['path']]
+            if any(tuple(bonus.position) in crossed for bonus in self.bonus_malus if not bonus.triggered):
+                return None
+        
+        # Don't copy queued animations, the simulated state resolves instantly
+        action_queue = self.action_queue
+        self.action_queue = ActionQueue()
+        try:
+            future = copy.deepcopy(self)
+        finally:
+            self.action_queue = action_queue
+        
+        resolve_action(action, future)
+        future.notifications = []
+        
+        future.check_win_condition()
+        if future.game_over:
+            return None
+        
+        future.next_action()
+        return future
+    
     def check_win_condition(self):
         """
         Check if the game has been won by either team.
@@ -7,16 +7,24 @@ Agents can move, attack, and communicate with teammates.
 """
 
 import pygame
+import random
 import sys
 import time
 from constants import *
 from game_state import GameState
 from renderer import GameRenderer
+from text_cache import get_font, render_text
+from dirty_rects import DirtyTracker
 from ui_components import LeftPanel, RightPanel, BottomPanel
-from actions import parse_action_string
+from actions import build_action
+from decisions import PendingDecision, decision_state_key
+from ai_metrics import format_summary
 import ai_interface  # Import module to access classes dynamically
 from utils import get_visible_cells
 
+# Posted by the decision threads when the AI answers, to wake an idle game loop
+AI_DECISION_EVENT = pygame.USEREVENT + 1
+
 
 class Game:
     """
@@ -24,7 +32,7 @@ class Game:
     Handles game loop, input, and coordination between components.
     """
     
-    def __init__(self, red_ai_class="MockAIInterface", blue_ai_class="MockAIInterface", use_manual_mode=False, nb_bonuses=NB_BONUS):
+    def __init__(self, red_ai_class="MockAIInterface", blue_ai_class="MockAIInterface", use_manual_mode=False, nb_bonuses=NB_BONUS, speculative=AI_SPECULATIVE_PREFETCH):
         """
         Initialize the game.
         
@@ -33,6 +41,7 @@ class Game:
             blue_ai_class (str): Name of the AI class for Blue team
             use_manual_mode (bool): Start in manual mode
             nb_bonuses (int): Number of bonuses to generate
+            speculative (bool): Request the next decision while the current action animates
         """
         # Initialize Pygame
         pygame.init()
@@ -47,6 +56,7 @@ class Game:
         self.paused = False
         self.is_manual_mode = use_manual_mode
         self.nb_bonuses = nb_bonuses
+        self.speculative = speculative
         
         # Game state
         self.game_state = GameState(nb_bonuses=self.nb_bonuses)
@@ -65,6 +75,10 @@ class Game:
             self.renderer
         )
         
+        # Regions of the window to redraw each frame
+        self.dirty_tracker = DirtyTracker(self.screen.get_rect())
+        self.idle_event = None  # Event that woke the idle loop, handled next frame
+        
         # Initialize AI interfaces for each team
         try:
             RedAIClass = getattr(ai_interface, red_ai_class)
@@ -82,19 +96,37 @@ class Game:
             print(f"Error: AI class '{blue_ai_class}' not found in ai_interface.py. Defaulting to MockAIInterface.")
             self.blue_ai = ai_interface.MockAIInterface()
         
+        # Identify this game's requests in the shared request scheduler
+        for ai in (self.red_ai, self.blue_ai):
+            ai.game_id = id(self)
+        
         # Game state flags
         self.waiting_for_ai = False
         self.ai_request_time = None
+        self.pending_decision = None  # Decision being requested for the current agent
+        self.ai_failures = 0  # Consecutive decisions without an action
+        self.speculative_decision = None  # Decision requested ahead for the next agent
         
         # Update UI
         self.left_panel.update_cards()
     
     def handle_events(self):
         """Handle pygame events (keyboard, mouse, etc.)."""
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.idle_event:
+            events.insert(0, self.idle_event)
+            self.idle_event = None
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            elif event.type == AI_DECISION_EVENT:
+                pass  # Only wakes the loop, update() applies the decision
+            
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.dirty_tracker.invalidate()
+            
             elif event.type == pygame.KEYDOWN:
                 # R - Restart game
                 if event.key == pygame.K_r:
@@ -134,12 +166,41 @@ class Game:
     def restart_game(self):
         """Restart the game with a new initial state."""
         print("\n=== RESTARTING GAME ===\n")
+        self.report_ai_metrics()
         # Re-initialize game state with original params
         self.game_state.__init__(nb_bonuses=self.nb_bonuses)
+        self.renderer.invalidate_background()
+        self.dirty_tracker.invalidate()
         
         self.left_panel.update_cards()
         self.right_panel.clear_bubbles()
         self.waiting_for_ai = False
+        self.pending_decision = None
+        self.speculative_decision = None
+    
+    def report_ai_metrics(self):
+        """Print the AI metrics of the game that just ended, and start new ones."""
+        for team, ai in (('Red', self.red_ai), ('Blue', self.blue_ai)):
+            metrics = getattr(ai, 'metrics', None)
+            if metrics is None:
+                continue
+            summary = metrics.end_game(f"{team} Team AI ({type(ai).__name__}, {ai.model})")
+            if summary:
+                print(format_summary(summary))
+                if len(ai.endpoints.endpoints) > 1:
+                    print(ai.endpoints.format_stats())
+    
+    def get_ai_for_agent(self, agent):
+        """
+        Get the AI interface controlling an agent.
+        
+        Args:
+            agent (Agent): The agent
+        
+        Returns:
+            AIInterface: The AI of the agent's team
+        """
+        return self.red_ai if agent.team == 'red' else self.blue_ai
     
     def request_next_action(self):
         """Request the next action from the AI for the current agent."""
@@ -156,18 +217,39 @@ class Game:
         self.waiting_for_ai = True
         self.ai_request_time = time.time()
         
-        # Select AI based on team
-        ai_interface_instance = self.red_ai if current_agent.team == 'red' else self.blue_ai
+        # Reuse the speculative decision if it was computed for this exact state
+        speculative = self.speculative_decision
+        self.speculative_decision = None
+        if speculative and speculative.matches(current_agent, self.game_state.turn, self.game_state):
+            self.pending_decision = speculative
+            return
+        
+        # Request decision from the AI of the agent's team
+        self.pending_decision = PendingDecision(
+            self.get_ai_for_agent(current_agent),
+            current_agent,
+            self.game_state.turn,
+            self.game_state,
+            on_done=self.wake_up
+        )
+    
+    def apply_decision(self, decision):
+        """
+        Apply an AI decision for the current agent.
+        
+        Args:
+            decision (PendingDecision): The completed decision
+        """
+        current_agent = self.game_state.get_current_agent()
         
-        # Request decision from AI
         try:
-            thoughts, action = ai_interface_instance.get_agent_decision(
-                current_agent,
-                self.game_state.turn,
-                self.game_state
-            )
+            if decision.error:
+                raise decision.error
+            
+            thoughts, action = decision.thoughts, decision.action
             
             if thoughts and action:
+                self.ai_failures = 0
                 print(f"Thoughts: {thoughts}")
                 print(f"Action: {action}")
                 
@@ -188,17 +270,24 @@ class Game:
                 )
                 
                 # Parse and execute action
-                action_obj = parse_action_string(action, current_agent.id, self.game_state)
+                action_obj = build_action(action, current_agent.id, self.game_state)
                 
                 if action_obj:
                     # Add to action queue
                     self.game_state.action_queue.add_action(action_obj)
                     
+                    # Ask for the next decision while this one animates
+                    if self.speculative:
+                        self.start_speculative_decision(action_obj)
+                    
                 else:
                     print(f"Invalid action: {action}")
                     self.game_state.next_action()  # Skip invalid action
             else:
-                print("AI returned no action")
+                # Back off before asking again (the AI already retried up to its deadline)
+                self.ai_failures += 1
+                self.action_delay_timer = min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2 ** self.ai_failures)
+                print(f"AI returned no action, asking again in {self.action_delay_timer:.1f}s")
         
         except Exception as e:
             print(f"Error getting AI decision: {e}")
@@ -206,6 +295,32 @@ class Game:
         finally:
             self.waiting_for_ai = False
     
+    def start_speculative_decision(self, action):
+        """
+        Request the next agent's decision on the predicted state after an action.
+        The result is discarded if the real state turns out to differ.
+        
+        Args:
+            action (Action): The action that is about to be played
+        """
+        future_state = self.game_state.simulate_action(action)
+        if future_state is None:
+            return
+        
+        next_agent = future_state.get_current_agent()
+        if not next_agent or not next_agent.is_alive():
+            return
+        
+        self.speculative_decision = PendingDecision(
+            self.get_ai_for_agent(next_agent),
+            next_agent,
+            future_state.turn,
+            future_state,
+            state_key=decision_state_key(next_agent, future_state.turn, future_state),
+            priority=-1,  # Requests the game is waiting for go first
+            on_done=self.wake_up
+        )
+    
     def update(self, dt):
         """
         Update game state.
@@ -216,6 +331,22 @@ class Game:
         if self.paused or self.game_state.game_over:
             return
         
+        # Apply the AI decision once it's available
+        if self.pending_decision and self.pending_decision.is_done():
+            decision = self.pending_decision
+            self.pending_decision = None
+            self.apply_decision(decision)
+        
+        # Show the reasoning while it is being streamed
+        elif self.pending_decision and self.pending_decision.partial_thoughts:
+            current_agent = self.game_state.get_current_agent()
+            if current_agent:
+                self.right_panel.show_partial_thoughts(
+                    current_agent.id,
+                    current_agent.team,
+                    self.pending_decision.partial_thoughts
+                )
+        
         # Update action queue (animations)
         action_completed = self.game_state.action_queue.update(dt, self.game_state)
         
@@ -228,7 +359,9 @@ class Game:
             # Check win condition after action execution (damage applied)
             self.game_state.check_win_condition()
             
-            if not self.game_state.game_over:
+            if self.game_state.game_over:
+                self.report_ai_metrics()
+            else:
                 # Move to next action/turn
                 self.game_state.next_action()
                 
@@ -249,39 +382,114 @@ class Game:
                     self.action_delay_timer = 0.5
     
     def render(self):
-        """Render the game."""
+        """Render the game, redrawing only the regions that changed."""
+        if not DIRTY_RECT_RENDERING:
+            self.draw_frame()
+            pygame.display.flip()
+            return
+        
+        dirty_rects = self.dirty_tracker.update(self.dirty_items())
+        if not dirty_rects:
+            return
+        
+        # Redraw every layer, clipped to each region
+        for rect in dirty_rects:
+            self.screen.set_clip(rect)
+            self.draw_frame()
+        self.screen.set_clip(None)
+        
+        # Update display
+        pygame.display.update(dirty_rects)
+    
+    def dirty_items(self):
+        """
+        Gather what the renderer, the panels and the banner show this frame.
+        
+        Returns:
+            dict: Item name -> (screen rect, key), see dirty_rects.py
+        """
+        items = self.renderer.dirty_items()
+        items.update(self.left_panel.dirty_items())
+        items.update(self.right_panel.dirty_items())
+        items.update(self.bottom_panel.dirty_items())
+        
+        banner = self.banner_layout()
+        if banner:
+            mode_text, _, _, bg_rect = banner
+            items['banner'] = (bg_rect, mode_text)
+        return items
+    
+    def banner_layout(self):
+        """
+        Lay out the pause/manual mode banner.
+        
+        Returns:
+            tuple: (text, text surface, text rect, background rect), or None if hidden
+        """
+        if not (self.paused or self.is_manual_mode):
+            return None
+        
+        mode_text = "PAUSED" if self.paused else "MANUAL MODE"
+        
+        text_surf = render_text(get_font(FONT_SIZE_BANNER), mode_text)
+        center = LEFT_PANEL_WIDTH + (WINDOW_WIDTH - (LEFT_PANEL_WIDTH + RIGHT_PANEL_WIDTH)) // 2
+        text_rect = text_surf.get_rect(center=(center, 50))
+        
+        # Background
+        bg_rect = text_rect.inflate(20, 10)
+        return mode_text, text_surf, text_rect, bg_rect
+    
+    def draw_frame(self):
+        """Draw every layer of the window (within the current clip)."""
+        clip = self.screen.get_clip()
+        
         # Clear screen
         self.screen.fill(COLOR_BG)
-
-        # Update debug cache (vision and possible moves)
-        self.renderer.update_debug_cache()
         
         # Render game grid and entities
         self.renderer.render(self.screen)
         
-        # Render UI panels
+        # Render UI panels (the right panel lays out every bubble, skip it when it's clipped out)
         self.left_panel.draw(self.screen)
-        self.right_panel.draw(self.screen)
-        self.bottom_panel.draw(self.screen)
+        if clip.colliderect(self.right_panel.rect):
+            self.right_panel.draw(self.screen)
+        if clip.colliderect(self.bottom_panel.rect):
+            self.bottom_panel.draw(self.screen)
         
         # Draw pause/manual indicators
-        if self.paused or self.is_manual_mode:
-            font = pygame.font.Font(None, 48)
-            mode_text = "PAUSED" if self.paused else "MANUAL MODE"
-            
-            text_surf = font.render(mode_text, True, COLOR_TEXT)
-            center = LEFT_PANEL_WIDTH + (WINDOW_WIDTH - (LEFT_PANEL_WIDTH + RIGHT_PANEL_WIDTH)) // 2
-            text_rect = text_surf.get_rect(center=(center, 50))
-
-            # Background
-            bg_rect = text_rect.inflate(20, 10)
+        banner = self.banner_layout()
+        if banner:
+            _, text_surf, text_rect, bg_rect = banner
             pygame.draw.rect(self.screen, COLOR_PANEL_BG, bg_rect)
             pygame.draw.rect(self.screen, COLOR_TEXT, bg_rect, 2)
             
             self.screen.blit(text_surf, text_rect)
+    
+    def is_animating(self):
+        """
+        Check if the next frames need the full frame rate.
         
-        # Update display
-        pygame.display.flip()
+        Returns:
+            bool: True while an action is animating or queued
+        """
+        action_queue = self.game_state.action_queue
+        return action_queue.is_busy() or action_queue.has_pending_actions()
+    
+    def wait_idle(self):
+        """
+        Sleep until an event arrives (input, AI answer) or the next idle frame is due.
+        The event is kept for handle_events.
+        """
+        event = pygame.event.wait(1000 // IDLE_FPS)
+        if event.type != pygame.NOEVENT:
+            self.idle_event = event
+    
+    def wake_up(self):
+        """Wake the game loop when a decision is ready (called from the decision threads)."""
+        try:
+            pygame.event.post(pygame.event.Event(AI_DECISION_EVENT))
+        except pygame.error:
+            pass  # The game has already quit
     
     def run(self):
         """Main game loop."""
@@ -313,8 +521,18 @@ class Game:
             # Render
             self.render()
             
-            # Cap frame rate
-            self.clock.tick(FPS)
+            # Cap frame rate, or sleep while nothing animates
+            if self.is_animating():
+                self.clock.tick(FPS)
+            else:
+                self.wait_idle()
+        
+        # Report the decisions the fallback AI had to take
+        for team, ai in (('Red', self.red_ai), ('Blue', self.blue_ai)):
+            fallback_events = getattr(ai, 'fallback_events', [])
+            if fallback_events:
+                print(f"{team} Team AI: {len(fallback_events)} decision(s) taken by the fallback AI")
+        self.report_ai_metrics()
         
         # Cleanup
         pygame.quit()
@@ -334,15 +552,23 @@ def main():
                        help='Start in manual mode (press N for next action)')
     parser.add_argument('--bonuses', type=int, default=NB_BONUS,
                        help='Number of bonus/malus items to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Random seed, to replay the same match (default: random)')
+    parser.add_argument('--no-speculation', action='store_true',
+                       help='Disable requesting the next decision while the current action animates')
     
     args = parser.parse_args()
     
+    if args.seed is not None:
+        random.seed(args.seed)
+    
     try:
         game = Game(
             red_ai_class=args.red_ai,
             blue_ai_class=args.blue_ai,
             use_manual_mode=args.manual,
-            nb_bonuses=args.bonuses
+            nb_bonuses=args.bonuses,
+            speculative=AI_SPECULATIVE_PREFETCH and not args.no_speculation
         )
         game.run()
     except KeyboardInterrupt:
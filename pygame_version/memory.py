@@ -0,0 +1,179 @@
+"""
+Agent memory module for BattleFieldAgents.
+Memory policies decide which part of an agent's messages and historic is sent
+to the AI, so that the prompt size stops growing with the number of turns.
+"""
+
+import json
+
+
+class MemoryPolicy:
+    """
+    Base memory policy: sends the whole memory.
+    Policies never modify the agent, they return the entries to send.
+    """
+
+    def apply_messages(self, messages):
+        """
+        Select the messages to send.
+
+        Args:
+            messages (list): Messages received by the agent (oldest first)
+
+        Returns:
+            list: Messages to put in the agent state
+        """
+        return messages
+
+    def apply_historic(self, historic):
+        """
+        Select the historic entries to send.
+
+        Args:
+            historic (list): Thoughts and actions of the agent (oldest first)
+
+        Returns:
+            list: Historic entries to put in the agent state
+        """
+        return historic
+
+
+class LastNMemory(MemoryPolicy):
+    """Sends only the last N messages and historic entries."""
+
+    def __init__(self, n):
+        """
+        Args:
+            n (int): Number of entries kept for each list
+        """
+        self.n = n
+
+    def apply_messages(self, messages):
+        return messages[-self.n:] if self.n > 0 else []
+
+    def apply_historic(self, historic):
+        return historic[-self.n:] if self.n > 0 else []
+
+
+class SummarizedMemory(MemoryPolicy):
+    """
+    Sends the last entries in full, and one short summary per turn for older ones.
+    Old historic entries lose their thoughts, old messages are truncated, and
+    only the most recent turn summaries are kept.
+    """
+
+    def __init__(self, keep_last, max_message_length=60, max_summaries=10):
+        """
+        Args:
+            keep_last (int): Number of recent entries kept in full
+            max_message_length (int): Length of old messages in the summaries
+            max_summaries (int): Number of turn summaries kept
+        """
+        self.keep_last = keep_last
+        self.max_message_length = max_message_length
+        self.max_summaries = max_summaries
+
+    def _split(self, entries):
+        """Split entries into (old, recent)."""
+        if len(entries) <= self.keep_last:
+            return [], entries
+        cut = len(entries) - self.keep_last
+        return entries[:cut], entries[cut:]
+
+    def apply_messages(self, messages):
+        old, recent = self._split(messages)
+
+        summaries = {}
+        for m in old:
+            text = m['message']
+            if len(text) > self.max_message_length:
+                text = text[:self.max_message_length - 3] + '...'
+            summaries.setdefault(m['turn'], []).append(f"{m['sender']}: {text}")
+
+        return [
+            {'turn': turn, 'summary': ' | '.join(lines)}
+            for turn, lines in list(summaries.items())[-self.max_summaries:]
+        ] + recent
+
+    def apply_historic(self, historic):
+        old, recent = self._split(historic)
+
+        summaries = {}
+        for h in old:
+            summaries.setdefault(h['turn'], []).append(h['action'])
+
+        return [
+            {'turn': turn, 'actions': actions}
+            for turn, actions in list(summaries.items())[-self.max_summaries:]
+        ] + recent
+
+
+def make_memory_policy(name, size):
+    """
+    Build a memory policy from its name.
+
+    Args:
+        name (str): "full", "last_n" or "summary"
+        size (int): Number of recent entries kept (last_n and summary)
+
+    Returns:
+        MemoryPolicy: The policy
+    """
+    if name == "full":
+        return MemoryPolicy()
+    if name == "last_n":
+        return LastNMemory(size)
+    if name == "summary":
+        return SummarizedMemory(size)
+    raise ValueError(f"Unknown memory policy '{name}'")
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about 4 characters per token)."""
+    return len(text) // 4
+
+
+# Benchmark: payload size of a long game's memory under each policy
+if __name__ == "__main__":
+    def simulated_memory(nb_turns):
+        """Memory of an agent after nb_turns turns, with a bonus triggered every 3 turns."""
+        messages, historic = [], []
+        for turn in range(1, nb_turns + 1):
+            for action_number in range(1, 4):
+                historic.append({
+                    'turn': turn,
+                    'actionNumber': action_number,
+                    'thoughts': "The enemy agent blue_2 is two cells away behind the obstacle, "
+                                "I move to get a clear line of sight while staying close to our target.",
+                    'action': f"MOVE [{turn % 7}, {action_number - 2}]"
+                })
+            messages.append({
+                'turn': turn, 'sender': 'red_2', 'position': [1, -3],
+                'message': "I see blue_1 near [2, 4], cover me while I attack their target."
+            })
+            if turn % 3 == 0:
+                # Broadcast once per trigger, as GameState._apply_bonus_effect does
+                messages.append({
+                    'turn': turn, 'sender': 'SYSTEM', 'position': [0, 2],
+                    'message': f"Turn {turn}: blue_3 triggered GRENADE"
+                })
+        return messages, historic
+
+    policies = {
+        "full": make_memory_policy("full", 0),
+        "last_n (6)": make_memory_policy("last_n", 6),
+        "summary (6)": make_memory_policy("summary", 6),
+    }
+
+    print(f"{'turns':>6} " + " ".join(f"{name:>14}" for name in policies))
+    for nb_turns in (5, 20, 50, 100):
+        messages, historic = simulated_memory(nb_turns)
+        row = []
+        for policy in policies.values():
+            payload = json.dumps({
+                'messages': policy.apply_messages(messages),
+                'historic': policy.apply_historic(historic)
+            })
+            row.append(f"{estimate_tokens(payload):>14}")
+        print(f"{nb_turns:>6} " + " ".join(row))
+    print("(estimated tokens of the messages + historic fields)")
@@ -0,0 +1,108 @@
+"""
+Rule-based decisions from a formatted agent state, for BattleFieldAgents.
+Mirrors the MockAIInterface rules without needing the live game objects, so
+the stand-in LLM server (fake_llm_server.py) can answer from the posted state
+alone. Depends on the standard library and the game's own modules only.
+"""
+
+from utils import distance
+
+
+def _target_position(state):
+    """Position of the enemy target: seen now, seen before, or mirrored from ours."""
+    if state['enemyTarget']:
+        return state['enemyTarget'][0]['position']
+    seen = [v['position'] for k, v in state['lastPosSeen'].items() if k.startswith('target_')]
+    if seen:
+        return seen[0]
+    if state['friendlyTarget']:
+        # Obstacles and spawns are symmetric around [0, 0]
+        return [-state['friendlyTarget'][0]['position'][0], -state['friendlyTarget'][0]['position'][1]]
+    return [0, 0]
+
+
+def decide_from_state(state):
+    """
+    Same rules as MockAIInterface.get_agent_decision, from a formatted agent
+    state only (see format_agent_state).
+
+    Args:
+        state (dict): Formatted agent state
+
+    Returns:
+        tuple: (thoughts, action)
+    """
+    position = state['position']
+    possible_actions = state['possibleActions']
+
+    # 1. Attack the closest enemy in sight
+    attackable = [
+        e for e in state['enemies'] + state['enemyTarget']
+        if f"ATTACK [{e['position'][0]}, {e['position'][1]}]" in possible_actions
+    ]
+    if attackable:
+        closest_enemy = min(attackable, key=lambda e: distance(position, e['position']))
+        enemy_pos = closest_enemy['position']
+        thoughts = f"Enemy '{closest_enemy.get('id', 'target')}' spotted at {enemy_pos}. Clear line of sight. Attacking!"
+        return thoughts, f"ATTACK [{enemy_pos[0]}, {enemy_pos[1]}]"
+
+    # 2. Move towards the enemy target
+    target_pos = _target_position(state)
+
+    moves = []
+    for a in possible_actions:
+        if a.startswith('MOVE ['):
+            x, y = a[6:-1].split(',')
+            moves.append([int(x), int(y)])
+    if moves:
+        best_move = min(moves, key=lambda move: distance(move, target_pos))
+        thoughts = f"No enemy in my line of sight. Moving towards the enemy target at {target_pos}."
+        return thoughts, f"MOVE [{best_move[0]}, {best_move[1]}]"
+
+    # 3. If no other action, wait
+    return "No valid moves or attacks available. Waiting.", "WAIT"
+
+
+def plan_from_state(state):
+    """
+    Plan the remaining actions of a turn with the same rules, from a formatted
+    agent state only. Attacks and waits are repeated; after a move, the next
+    moves are guessed by shifting the reachable cells along with the agent,
+    avoiding the cells seen occupied. The game checks each planned action
+    before playing it, so a wrong guess only costs a new request.
+
+    Args:
+        state (dict): Formatted agent state
+
+    Returns:
+        tuple: (thoughts, actions) with up to state['actionsLeft'] actions
+    """
+    thoughts, action = decide_from_state(state)
+    actions = [action]
+    if not action.startswith('MOVE ['):
+        return thoughts, actions * state['actionsLeft']
+
+    position = state['position']
+    target = [int(v) for v in action[6:-1].split(',')]
+    moves = [
+        [int(v) for v in a[6:-1].split(',')]
+        for a in state['possibleActions'] if a.startswith('MOVE [')
+    ]
+    offsets = [[x - position[0], y - position[1]] for x, y in moves]
+    occupied = [
+        e['position'] for e in state['friends'] + state['enemies'] + state['friendlyTarget']
+        + state['enemyTarget'] + state['obstacles']
+    ]
+    goal = _target_position(state)
+
+    current = target
+    for _ in range(state['actionsLeft'] - 1):
+        candidates = [
+            [current[0] + dx, current[1] + dy] for dx, dy in offsets
+            if [current[0] + dx, current[1] + dy] not in occupied
+        ]
+        if not candidates:
+            break
+        current = min(candidates, key=lambda move: distance(move, goal))
+        actions.append(f"MOVE [{current[0]}, {current[1]}]")
+    return thoughts, actions
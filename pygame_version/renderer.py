@@ -5,10 +5,12 @@ Handles rendering of the game grid, agents, targets, obstacles, and animations.
 
 import pygame
 import math
+import time
 from constants import *
 from agents import Agent, Target, Obstacle
 from actions import MoveAction, AttackAction, SpeakAction
 from utils import get_possible_moves, get_visible_cells
+from text_cache import get_font, render_text
 
 
 class GameRenderer:
@@ -34,6 +36,9 @@ class GameRenderer:
         # Cached debug info
         self.cached_visible_cells = []
         self.cached_possible_moves = []
+        self.debug_cache_key = None  # (state version, agent ID) the debug info was computed for
+        self.overlay_surface = None  # Reused between frames
+        self.overlay_key = None  # (state version, agent ID, flags) the overlay surface shows
         
         # Calculate grid dimensions and position
         self.grid_width = (2 * BOARD_SIZE + 1) * CELL_SIZE
@@ -47,11 +52,22 @@ class GameRenderer:
         self.grid_y = (available_height - self.grid_height) // 2
         
         # Fonts
-        self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
+        self.font_small = get_font(FONT_SIZE_SMALL)
+        
+        # Static layers of the map (grid and obstacles), built on first draw
+        self.background = None
+        self.obstacle_layer = None
+        self.background_obstacles = None  # Obstacle list the layers were built from
+        self.win_overlay = None
 
     def update_debug_cache(self):
-        """Update the cached debug information (vision and moves)."""
+        """Update the cached debug information (vision and moves) if the board or the current agent changed."""
         current_agent = self.game_state.get_current_agent()
+        key = (self.game_state.version, current_agent.id if current_agent else None)
+        if key == self.debug_cache_key:
+            return
+        self.debug_cache_key = key
+        
         if current_agent:
             self.cached_visible_cells = get_visible_cells(
                 current_agent,
@@ -69,6 +85,57 @@ class GameRenderer:
             self.cached_visible_cells = []
             self.cached_possible_moves = []
     
+    def invalidate_background(self):
+        """Drop the cached map layers, e.g. after a restart or a resize."""
+        self.background = None
+        self.obstacle_layer = None
+        self.background_obstacles = None
+    
+    def _build_background(self):
+        """Pre-render the grid and the obstacles of the current map."""
+        self.background = pygame.Surface((self.grid_width, self.grid_height)).convert()
+        self.draw_grid(self.background)
+        self.draw_obstacles(self.background)
+        self.obstacle_layer = None
+        self.background_obstacles = self.game_state.obstacles
+    
+    def draw_background(self, surface):
+        """
+        Blit the cached grid and obstacles, rebuilding them when the map changed.
+        
+        Args:
+            surface (pygame.Surface): Surface to draw on
+        """
+        if self.background is None or self.background_obstacles is not self.game_state.obstacles:
+            self._build_background()
+        surface.blit(self.background, (self.grid_x, self.grid_y))
+    
+    def draw_obstacle_layer(self, surface):
+        """
+        Blit the obstacles alone, to keep them above the debug overlays.
+        
+        Args:
+            surface (pygame.Surface): Surface to draw on
+        """
+        if self.obstacle_layer is None:
+            self.obstacle_layer = pygame.Surface((self.grid_width, self.grid_height), pygame.SRCALPHA).convert_alpha()
+            self.draw_obstacles(self.obstacle_layer)
+        surface.blit(self.obstacle_layer, (self.grid_x, self.grid_y))
+    
+    def _cell_rect(self, world_pos):
+        """
+        Get the rectangle of a cell on a map layer (grid coordinates, not screen).
+        
+        Args:
+            world_pos (list): World position [x, y]
+        
+        Returns:
+            pygame.Rect: The cell, relative to the top left corner of the grid
+        """
+        grid_x = world_pos[0] + BOARD_SIZE
+        grid_y = world_pos[1] + BOARD_SIZE
+        return pygame.Rect(grid_x * CELL_SIZE, grid_y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    
     def world_to_screen(self, world_pos):
         """
         Convert world coordinates to screen coordinates.
@@ -95,13 +162,13 @@ class GameRenderer:
         Draw the game grid with alternating colors.
         
         Args:
-            surface (pygame.Surface): Surface to draw on
+            surface (pygame.Surface): Map layer to draw on (grid coordinates)
         """
         for grid_x in range(2 * BOARD_SIZE + 1):
             for grid_y in range(2 * BOARD_SIZE + 1):
-                # Calculate screen position
-                screen_x = self.grid_x + grid_x * CELL_SIZE
-                screen_y = self.grid_y + grid_y * CELL_SIZE
+                # Calculate position on the layer
+                screen_x = grid_x * CELL_SIZE
+                screen_y = grid_y * CELL_SIZE
                 
                 # Alternating colors (checkerboard pattern)
                 if (grid_x + grid_y) % 2 == 0:
@@ -118,30 +185,36 @@ class GameRenderer:
                 if SHOW_COORDINATES and grid_x % 5 == 0 and grid_y % 5 == 0:
                     world_x = grid_x - BOARD_SIZE
                     world_y = grid_y - BOARD_SIZE
-                    coord_text = self.font_small.render(f"{world_x},{world_y}", True, COLOR_TEXT_SECONDARY)
+                    coord_text = render_text(self.font_small, f"{world_x},{world_y}", COLOR_TEXT_SECONDARY)
                     text_x = screen_x + 2
                     text_y = screen_y + 2
                     surface.blit(coord_text, (text_x, text_y))
     
     def _draw_debug_rect(self, surface, world_pos, color):
         """Helper to draw a debug rectangle on the overlay surface."""
-        grid_x = world_pos[0] + BOARD_SIZE
-        grid_y = world_pos[1] + BOARD_SIZE
-        
-        rect = pygame.Rect(
-            grid_x * CELL_SIZE,
-            grid_y * CELL_SIZE,
-            CELL_SIZE,
-            CELL_SIZE
-        )
-        pygame.draw.rect(surface, color, rect)
+        pygame.draw.rect(surface, color, self._cell_rect(world_pos))
 
     def draw_debug_overlays(self, surface):
-        """Draw semi-transparent overlays for debugging."""
-        if not (self.show_possible_moves or self.show_agent_position or self.show_agent_vision):
+        """Draw semi-transparent overlays for debugging (redrawn only when their content changes)."""
+        flags = (self.show_possible_moves, self.show_agent_position, self.show_agent_vision)
+        if not any(flags):
             return
-
-        overlay_surface = pygame.Surface((self.grid_width, self.grid_height), pygame.SRCALPHA)
+        
+        if self.show_possible_moves or self.show_agent_vision:
+            self.update_debug_cache()
+        key = (self.game_state.version, self.game_state.turn['agent_id'], flags)
+        if key != self.overlay_key:
+            self._draw_overlay_surface()
+            self.overlay_key = key
+        
+        surface.blit(self.overlay_surface, (self.grid_x, self.grid_y))
+    
+    def _draw_overlay_surface(self):
+        """Draw the enabled debug overlays on the reused overlay surface."""
+        if self.overlay_surface is None:
+            self.overlay_surface = pygame.Surface((self.grid_width, self.grid_height), pygame.SRCALPHA)
+        overlay_surface = self.overlay_surface
+        overlay_surface.fill((0, 0, 0, 0))
         current_agent = self.game_state.get_current_agent()
 
         if current_agent:
@@ -159,8 +232,6 @@ class GameRenderer:
             if self.show_agent_position:
                 self._draw_debug_rect(overlay_surface, current_agent.position, COLOR_DEBUG_AGENT_POSITION)
 
-        surface.blit(overlay_surface, (self.grid_x, self.grid_y))
-
     def draw_bonuses(self, surface):
         """
         Draw bonus/malus items.
@@ -182,7 +253,7 @@ class GameRenderer:
             pygame.draw.rect(surface, COLOR_TEXT, bonus_rect, 1, border_radius=5)
             
             # Draw "?" text
-            text_surf = self.font_small.render("?", True, COLOR_TEXT)
+            text_surf = render_text(self.font_small, "?")
             text_rect = text_surf.get_rect(center=screen_pos)
             surface.blit(text_surf, text_rect)
 
@@ -191,18 +262,11 @@ class GameRenderer:
         Draw obstacles with hatched pattern.
         
         Args:
-            surface (pygame.Surface): Surface to draw on
+            surface (pygame.Surface): Map layer to draw on (grid coordinates)
         """
         for obstacle in self.game_state.obstacles:
-            screen_pos = self.world_to_screen(obstacle.position)
-            
             # Draw obstacle as a filled square with hatching
-            obstacle_rect = pygame.Rect(
-                screen_pos[0] - CELL_SIZE // 2,
-                screen_pos[1] - CELL_SIZE // 2,
-                CELL_SIZE,
-                CELL_SIZE
-            )
+            obstacle_rect = self._cell_rect(obstacle.position)
             
             # Fill with dark color
             pygame.draw.rect(surface, COLOR_OBSTACLE, obstacle_rect)
@@ -240,13 +304,7 @@ class GameRenderer:
             if not target.is_alive():
                 continue
             
-            # Check if target should blink (being attacked)
-            should_render = True
-            if current_action and isinstance(current_action, AttackAction):
-                if target.position == current_action.params['target_position']:
-                    should_render = current_action.should_render_target()
-            
-            if should_render:
+            if self._is_shown(target, current_action):
                 screen_pos = self.world_to_screen(target.position)
                 
                 # Draw diamond shape (4 points)
@@ -260,6 +318,41 @@ class GameRenderer:
                 pygame.draw.polygon(surface, target.get_color(), points)
                 pygame.draw.polygon(surface, COLOR_TEXT, points, 2)
     
+    def _agent_screen_pos(self, agent, current_action):
+        """
+        Get where an agent is drawn, following its move animation.
+        
+        Args:
+            agent (Agent): The agent
+            current_action (Action): The action being animated, or None
+        
+        Returns:
+            tuple: Screen position (x, y) in pixels
+        """
+        # Check if this agent is currently moving
+        draw_pos = agent.position
+        if current_action and isinstance(current_action, MoveAction) and current_action.agent_id == agent.id:
+            # Get interpolated position during movement
+            draw_pos = current_action.get_current_position(agent)
+        
+        return self.world_to_screen(draw_pos)
+    
+    def _is_shown(self, entity, current_action):
+        """
+        Check if an agent or a target is drawn this frame (it blinks while attacked).
+        
+        Args:
+            entity (Agent or Target): The entity
+            current_action (Action): The action being animated, or None
+        
+        Returns:
+            bool: False while the entity is blinked out
+        """
+        if current_action and isinstance(current_action, AttackAction):
+            if entity.position == current_action.params['target_position']:
+                return current_action.should_render_target()
+        return True
+    
     def draw_agents(self, surface):
         """
         Draw agents as colored circles.
@@ -274,27 +367,15 @@ class GameRenderer:
             if not agent.is_alive():
                 continue
             
-            # Check if this agent is currently moving
-            draw_pos = agent.position
-            if current_action and isinstance(current_action, MoveAction) and current_action.agent_id == agent.id:
-                # Get interpolated position during movement
-                draw_pos = current_action.get_current_position(agent)
+            screen_pos = self._agent_screen_pos(agent, current_action)
             
-            screen_pos = self.world_to_screen(draw_pos)
-            
-            # Check if agent should blink (being attacked)
-            should_render = True
-            if current_action and isinstance(current_action, AttackAction):
-                if agent.position == current_action.params['target_position']:
-                    should_render = current_action.should_render_target()
-            
-            if should_render:
+            if self._is_shown(agent, current_action):
                 # Draw agent circle
                 pygame.draw.circle(surface, agent.get_color(), screen_pos, AGENT_RADIUS)
                 pygame.draw.circle(surface, COLOR_TEXT, screen_pos, AGENT_RADIUS, 2)
                 
                 # Draw agent ID text
-                id_text = self.font_small.render(agent.id, True, COLOR_TEXT)
+                id_text = render_text(self.font_small, agent.id)
                 text_x = screen_pos[0] - id_text.get_width() // 2
                 text_y = screen_pos[1] - id_text.get_height() // 2
                 surface.blit(id_text, (text_x, text_y))
@@ -331,13 +412,12 @@ class GameRenderer:
         current_agent = self.game_state.get_current_agent()
         if current_agent and current_agent.is_alive():
             screen_pos = self.world_to_screen(current_agent.position)
-            
-            # Pulsing highlight effect
-            import time
-            pulse = (math.sin(time.time() * 3) + 1) / 2  # 0 to 1
-            radius = AGENT_RADIUS + 8 + int(pulse * 4)
-            
-            pygame.draw.circle(surface, COLOR_HIGHLIGHT_YELLOW, screen_pos, radius, 2)
+            pygame.draw.circle(surface, COLOR_HIGHLIGHT_YELLOW, screen_pos, self._highlight_radius(), 2)
+    
+    def _highlight_radius(self):
+        """Radius of the pulsing highlight of the current agent."""
+        pulse = (math.sin(time.time() * 3) + 1) / 2  # 0 to 1
+        return AGENT_RADIUS + 8 + int(pulse * 4)
     
     def draw_game_info(self, surface):
         """
@@ -346,6 +426,21 @@ class GameRenderer:
         Args:
             surface (pygame.Surface): Surface to draw on
         """
+        text_surface, text_pos, bg_rect = self._game_info_layout()
+        
+        # Background for text
+        pygame.draw.rect(surface, COLOR_PANEL_BG, bg_rect)
+        pygame.draw.rect(surface, COLOR_TEXT, bg_rect, 1)
+        
+        surface.blit(text_surface, text_pos)
+    
+    def _game_info_layout(self):
+        """
+        Lay out the turn info box.
+        
+        Returns:
+            tuple: (text surface, text position, background rect)
+        """
         info = self.game_state.get_game_info()
         
         # Draw info box at top center of grid area
@@ -354,15 +449,11 @@ class GameRenderer:
         
         # Turn info
         turn_text = f"Turn {info['turn']} - {info['current_agent']} ({info['action_count']}/{NB_ACTIONS_PER_TURN})"
-        text_surface = self.font_small.render(turn_text, True, COLOR_TEXT)
+        text_surface = render_text(self.font_small, turn_text)
         text_x = info_x - text_surface.get_width() // 2
         
-        # Background for text
         bg_rect = pygame.Rect(text_x - 5, info_y - 5, text_surface.get_width() + 10, text_surface.get_height() + 10)
-        pygame.draw.rect(surface, COLOR_PANEL_BG, bg_rect)
-        pygame.draw.rect(surface, COLOR_TEXT, bg_rect, 1)
-        
-        surface.blit(text_surface, (text_x, info_y))
+        return text_surface, (text_x, info_y), bg_rect
     
     def draw_win_screen(self, surface):
         """
@@ -374,13 +465,13 @@ class GameRenderer:
         if not self.game_state.game_over:
             return
         
-        # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        surface.blit(overlay, (0, 0))
+        # Semi-transparent overlay (created once)
+        if self.win_overlay is None:
+            self.win_overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            self.win_overlay.fill((0, 0, 0, 180))
+        surface.blit(self.win_overlay, (0, 0))
         
         # Win text
-        font_large = pygame.font.Font(None, 72)
         winner_text = f"{self.game_state.winner.upper()} TEAM WINS!"
         
         if self.game_state.winner == 'red':
@@ -388,19 +479,74 @@ class GameRenderer:
         else:
             color = COLOR_TEAM_BLUE
         
-        text_surface = font_large.render(winner_text, True, color)
+        text_surface = render_text(get_font(FONT_SIZE_WIN_TITLE), winner_text, color)
         text_x = LEFT_PANEL_WIDTH + (WINDOW_WIDTH - LEFT_PANEL_WIDTH - RIGHT_PANEL_WIDTH - text_surface.get_width()) // 2
         text_y = WINDOW_HEIGHT // 2 - 50
         surface.blit(text_surface, (text_x, text_y))
         
         # Instructions
-        font_small = pygame.font.Font(None, 36)
         instruction_text = "Press R to restart"
-        text_surface = font_small.render(instruction_text, True, COLOR_TEXT)
+        text_surface = render_text(get_font(FONT_SIZE_WIN_HINT), instruction_text)
         text_x = LEFT_PANEL_WIDTH + (WINDOW_WIDTH - LEFT_PANEL_WIDTH - RIGHT_PANEL_WIDTH - text_surface.get_width()) // 2
         text_y = WINDOW_HEIGHT // 2 + 50
         surface.blit(text_surface, (text_x, text_y))
     
+    def dirty_items(self):
+        """
+        Describe what the grid area shows this frame, for dirty-rect rendering
+        (see dirty_rects.py).
+        
+        Returns:
+            dict: Item name -> (screen rect, key); an item is redrawn when its
+            rect or key changes
+        """
+        items = {}
+        current_action = self.game_state.action_queue.get_current_action()
+        grid_rect = pygame.Rect(self.grid_x, self.grid_y, self.grid_width, self.grid_height)
+        
+        def around(screen_pos, radius):
+            rect = pygame.Rect(0, 0, 2 * radius + 4, 2 * radius + 4)
+            rect.center = (int(screen_pos[0]), int(screen_pos[1]))
+            return rect
+        
+        # Debug overlays cover the whole board
+        flags = (self.show_possible_moves, self.show_agent_position, self.show_agent_vision)
+        if any(flags):
+            items['overlays'] = (grid_rect, (self.game_state.version, self.game_state.turn['agent_id'], flags))
+        
+        for bonus in self.game_state.bonus_malus:
+            items[('bonus', tuple(bonus.position))] = (around(self.world_to_screen(bonus.position), CELL_SIZE // 2), None)
+        
+        for target in self.game_state.targets:
+            if target.is_alive():
+                screen_pos = self.world_to_screen(target.position)
+                items[('target', target.team)] = (around(screen_pos, TARGET_SIZE), (self._is_shown(target, current_action), target.get_color()))
+        
+        for agent in self.game_state.agents:
+            if agent.is_alive():
+                screen_pos = self._agent_screen_pos(agent, current_action)
+                items[('agent', agent.id)] = (around(screen_pos, AGENT_RADIUS), (screen_pos, self._is_shown(agent, current_action), agent.get_color()))
+        
+        if current_action and isinstance(current_action, SpeakAction):
+            for entity in (self.game_state.get_agent_by_id(current_action.agent_id),
+                           self.game_state.get_entity_at_position(current_action.params['target_position'])):
+                if entity and isinstance(entity, Agent) and entity.is_alive():
+                    items[('speak', entity.id)] = (around(self.world_to_screen(entity.position), AGENT_RADIUS + 6), None)
+        
+        current_agent = self.game_state.get_current_agent()
+        if not self.game_state.action_queue.is_busy() and current_agent and current_agent.is_alive():
+            radius = self._highlight_radius()
+            items['highlight'] = (around(self.world_to_screen(current_agent.position), AGENT_RADIUS + 12), radius)
+        
+        _, _, info_rect = self._game_info_layout()
+        turn = self.game_state.turn
+        items['game_info'] = (info_rect, (turn['current'], turn['agent_id'], turn['action_count']))
+        
+        if self.game_state.game_over:
+            items['win_screen'] = (pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT), self.game_state.winner)
+        
+        return items
+    
     def render(self, surface):
         """
         Main render function - draws everything.
@@ -408,14 +554,13 @@ class GameRenderer:
         Args:
             surface (pygame.Surface): Surface to draw on
         """
-        # Draw grid
-        self.draw_grid(surface)
+        # Draw grid and obstacles (cached)
+        self.draw_background(surface)
         
-        # Draw debug overlays on top of the grid
-        self.draw_debug_overlays(surface)
-
-        # Draw obstacles
-        self.draw_obstacles(surface)
+        # Draw debug overlays on top of the grid, below the obstacles
+        if self.show_possible_moves or self.show_agent_position or self.show_agent_vision:
+            self.draw_debug_overlays(surface)
+            self.draw_obstacle_layer(surface)
 
         # Draw bonuses
         self.draw_bonuses(surface)
@@ -0,0 +1,187 @@
+"""
+Request scheduler module for BattleFieldAgents.
+Every AI request of the process goes through one shared scheduler, which
+enforces the provider's rate limit (token bucket), caps the number of requests
+in flight, and serves concurrent games fairly.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from constants import *
+
+
+class AdmissionTimeout(Exception):
+    """A request wasn't admitted before its deadline."""
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter (not thread-safe, used under the scheduler's lock).
+
+    Attributes:
+        rate (float): Tokens added per second
+        capacity (float): Maximum number of tokens (burst size)
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum number of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_update = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        """Add the tokens earned since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+        self.last_update = now
+
+    def time_until_token(self):
+        """
+        Returns:
+            float: Seconds to wait before a token is available (0 if available now)
+        """
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consume one token."""
+        self.tokens -= 1
+
+    def pause(self, duration):
+        """
+        Hand out no token for a while (e.g. after a 429 answer).
+
+        Args:
+            duration (float): Pause duration in seconds
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + duration)
+        self.tokens = 0
+
+
+class RequestScheduler:
+    """
+    Admission control for AI requests shared by all the games of the process.
+    Waiting requests are served by decreasing priority, then to the game that
+    has been served the least, then in arrival order.
+    """
+
+    def __init__(self, requests_per_second, burst, max_in_flight):
+        """
+        Args:
+            requests_per_second (float): Sustained request rate allowed by the provider
+            burst (int): Number of requests that can be sent at once after an idle period
+            max_in_flight (int): Maximum number of concurrent requests
+        """
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.served = {}  # game_id -> number of requests admitted
+        self._waiting = []  # heap of (-priority, served, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, game_id=None, priority=0, deadline=None):
+        """
+        Wait for the right to send a request, and hold it while the request runs.
+
+        Args:
+            game_id: Identifier of the game sending the request
+            priority (int): Higher priorities are served first
+            deadline (float): time.monotonic() after which to give up waiting
+
+        Raises:
+            AdmissionTimeout: If the request wasn't admitted before the deadline
+
+        Example:
+            with scheduler.slot(game_id, priority):
+                response = session.post(...)
+        """
+        self._acquire(game_id, priority, deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self, game_id, priority, deadline=None):
+        """Block until the request is admitted, or raise AdmissionTimeout at the deadline."""
+        with self._cond:
+            ticket = (-priority, self.served.get(game_id, 0), next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+
+            while True:
+                wait = None
+                if self._waiting[0] == ticket and self.in_flight < self.max_in_flight:
+                    wait = self.bucket.time_until_token()
+                    if wait <= 0:
+                        break
+
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # Leave the queue, the next request may now be first
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._cond.notify_all()
+                        raise AdmissionTimeout()
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+            heapq.heappop(self._waiting)
+            self.bucket.take()
+            self.in_flight += 1
+            self.served[game_id] = self.served.get(game_id, 0) + 1
+            self._cond.notify_all()
+
+    def _release(self):
+        """Free the request's in-flight slot."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def throttle(self, retry_after):
+        """
+        Stop admitting requests for a while, after the provider answered 429.
+
+        Args:
+            retry_after (float): Seconds to wait before the next request
+        """
+        with self._cond:
+            self.bucket.pause(retry_after)
+            self._cond.notify_all()
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler():
+    """
+    Get the scheduler shared by every AI interface of the process.
+
+    Returns:
+        RequestScheduler: The shared scheduler, configured from constants.py
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RequestScheduler(
+                AI_RATE_LIMIT_RPS,
+                AI_RATE_LIMIT_BURST,
+                AI_MAX_IN_FLIGHT
+            )
+        return _shared_scheduler
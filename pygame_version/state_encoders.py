@@ -0,0 +1,171 @@
+"""
+State encoders module for BattleFieldAgents.
+Turns the agent state built by format_agent_state() into the text sent to the
+LLM. Compact encodings mean fewer input tokens, hence a faster first token.
+"""
+
+import json
+from constants import *
+
+
+def encode_json(state):
+    """Default encoding: JSON with the default separators."""
+    return json.dumps(state)
+
+
+def encode_minified_json(state):
+    """JSON without any whitespace."""
+    return json.dumps(state, separators=(',', ':'))
+
+
+def _coords(entities):
+    """Format entity positions as 'x,y x,y ...'."""
+    return ' '.join(f"{e['position'][0]},{e['position'][1]}" for e in entities)
+
+
+def _units(entities):
+    """Format units as 'id@x,y(life)'."""
+    return ' '.join(
+        f"{e.get('id', e.get('team', '?'))}@{e['position'][0]},{e['position'][1]}({e.get('life', '?')})"
+        for e in entities
+    )
+
+
+def _memory_lines(state):
+    """Non-spatial fields, shared by the text encodings."""
+    last_seen = ' '.join(
+        f"{entity_id}@{seen['position'][0]},{seen['position'][1]}(t{seen['turn']})"
+        for entity_id, seen in state['lastPosSeen'].items()
+    )
+    return [
+        f"actionsLeft: {state['actionsLeft']}",
+        f"possibleActions: {' | '.join(state['possibleActions'])}",
+        f"lastPosSeen: {last_seen}",
+        f"messages: {json.dumps(state['messages'], separators=(',', ':'))}",
+        f"historic: {json.dumps(state['historic'], separators=(',', ':'))}",
+    ]
+
+
+def encode_coordinate_list(state):
+    """One line per field, entities as flat coordinate lists."""
+    lines = [
+        f"position: {state['position'][0]},{state['position'][1]}",
+        f"life: {state['life']}",
+        f"friends: {_units(state['friends'])}",
+        f"enemies: {_units(state['enemies'])}",
+        f"friendlyTarget: {_units(state['friendlyTarget'])}",
+        f"enemyTarget: {_units(state['enemyTarget'])}",
+        f"obstacles: {_coords(state['obstacles'])}",
+        f"bonuses: {_coords(state['bonuses'])}",
+    ]
+    return '\n'.join(lines + _memory_lines(state))
+
+
+# Map symbols, in drawing order (later ones win)
+ASCII_MAP_LEGEND = [
+    ('bonuses', '?'),
+    ('obstacles', '#'),
+    ('friendlyTarget', 'T'),
+    ('enemyTarget', 'X'),
+    ('friends', 'F'),
+    ('enemies', 'E'),
+]
+
+
+def encode_ascii_map(state):
+    """ASCII map of what the agent sees, followed by the non-spatial fields."""
+    size = 2 * BOARD_SIZE + 1
+    grid = [['.'] * size for _ in range(size)]
+
+    def put(position, symbol):
+        grid[position[1] + BOARD_SIZE][position[0] + BOARD_SIZE] = symbol
+
+    for field, symbol in ASCII_MAP_LEGEND:
+        for entity in state[field]:
+            put(entity['position'], symbol)
+    put(state['position'], '@')
+
+    # Columns are x, rows are y, both from -BOARD_SIZE to BOARD_SIZE
+    lines = [f"map (x from {-BOARD_SIZE} to {BOARD_SIZE} left to right, y from {-BOARD_SIZE} to {BOARD_SIZE} top to bottom):"]
+    for y, row in enumerate(grid):
+        lines.append(f"{y - BOARD_SIZE:>3} {''.join(row)}")
+
+    lines += [
+        f"life: {state['life']}",
+        f"units: {_units(state['friends'] + state['enemies'] + state['friendlyTarget'] + state['enemyTarget'])}",
+    ]
+    return '\n'.join(lines + _memory_lines(state))
+
+
+STATE_ENCODERS = {
+    'json': encode_json,
+    'minified_json': encode_minified_json,
+    'coordinates': encode_coordinate_list,
+    'ascii_map': encode_ascii_map,
+}
+
+# Appended to the system message so the model can read the non-JSON encodings
+STATE_ENCODER_DESCRIPTIONS = {
+    'json': "",
+    'minified_json': "",
+    'coordinates': (
+        "\n\nSTATE FORMAT: your state is sent as one 'field: value' line per field. "
+        "Positions are written 'x,y', units 'id@x,y(life)'."
+    ),
+    'ascii_map': (
+        "\n\nSTATE FORMAT: your state starts with a map of what you see. "
+        "'@' is you, 'F' a friend, 'E' an enemy, 'T' your target, 'X' the enemy target, "
+        "'#' an obstacle, '?' a bonus, '.' a free or unseen cell. "
+        "Each row starts with its y coordinate; x goes from left to right. "
+        "The other fields follow as 'field: value' lines, units written 'id@x,y(life)'."
+    ),
+}
+
+
+def get_state_encoder(name):
+    """
+    Get a state encoder by name.
+
+    Args:
+        name (str): One of STATE_ENCODERS
+
+    Returns:
+        tuple: (encode function, description to append to the system message)
+    """
+    if name not in STATE_ENCODERS:
+        raise ValueError(f"Unknown state encoder '{name}', expected one of {list(STATE_ENCODERS)}")
+    return STATE_ENCODERS[name], STATE_ENCODER_DESCRIPTIONS[name]
+
+
+# Benchmark: token count and encoding time of each encoder
+if __name__ == "__main__":
+    import timeit
+
+    def unit(kind, team, position, agent_id=None, life=100):
+        entity = {'kind': kind, 'position': position, 'team': team, 'life': life}
+        if agent_id:
+            entity['id'] = agent_id
+        return entity
+
+    sample_state = {
+        'messages': [{'turn': 2, 'sender': 'red_2', 'position': [-2, -1], 'message': "Blue_1 is near [2, 1], cover me."}],
+        'historic': [{'turn': 2, 'actionNumber': 1, 'thoughts': "I move closer to the enemy target.", 'action': "MOVE [-1, -3]"}],
+        'lastPosSeen': {'blue_1': {'position': [2, 1], 'turn': 2}},
+        'position': [-1, -3],
+        'life': 75,
+        'friends': [unit('agents', 'red', [-2, -1], 'red_2'), unit('agents', 'red', [-4, -2], 'red_3', 50)],
+        'enemies': [unit('agents', 'blue', [2, 1], 'blue_1'), unit('agents', 'blue', [3, 4], 'blue_3', 25)],
+        'friendlyTarget': [unit('targets', 'red', [-3, -3], life=150)],
+        'enemyTarget': [unit('targets', 'blue', [3, 3], life=125)],
+        'obstacles': [{'kind': 'obstacles', 'position': [x, (x * 7) % 13 - BOARD_SIZE]} for x in range(-BOARD_SIZE, BOARD_SIZE + 1)] * 2,
+        'bonuses': [{'kind': 'bonus', 'position': [1, -5], 'type': 'UNKNOWN'}, {'kind': 'bonus', 'position': [-1, 5], 'type': 'UNKNOWN'}],
+        'actionsLeft': 2,
+        'possibleActions': [f"MOVE [{x}, {y}]" for x in range(-3, 1) for y in range(-5, -1)] + ["ATTACK [2, 1]", "SPEAK [-2, -1]"],
+    }
+
+    print(f"{'encoder':>14} {'~tokens':>8} {'encode (us)':>12}")
+    for name, encode in STATE_ENCODERS.items():
+        text = encode(sample_state)
+        duration = timeit.timeit(lambda: encode(sample_state), number=2000) / 2000
+        print(f"{name:>14} {len(text) // 4:>8} {duration * 1e6:>12.1f}")
+    print("(tokens estimated at about 4 characters per token)")
@@ -0,0 +1,193 @@
+"""
+Structured output module for BattleFieldAgents.
+Lets the model answer with a JSON object instead of THOUGHTS:/ACTION: lines.
+The answer is checked by a validator compiled once from a JSON schema, and
+its action keeps its parsed fields, so it becomes an Action without any
+regex pass (see actions.build_action).
+"""
+
+import json
+
+ACTION_TYPES = ["MOVE", "ATTACK", "SPEAK", "WAIT"]
+
+# JSON schema of an answer, also sent to providers supporting "json_schema"
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "thoughts": {"type": "string"},
+        "action": {
+            "type": "object",
+            "properties": {
+                "type": {"type": "string", "enum": ACTION_TYPES},
+                "x": {"type": "integer"},
+                "y": {"type": "integer"},
+                "message": {"type": "string"}
+            },
+            "required": ["type"]
+        }
+    },
+    "required": ["thoughts", "action"]
+}
+
+# Fields needed by each action type, on top of the schema
+ACTION_FIELDS = {
+    "MOVE": ("x", "y"),
+    "ATTACK": ("x", "y"),
+    "SPEAK": ("x", "y", "message"),
+    "WAIT": (),
+}
+
+JSON_MODE_INSTRUCTIONS = (
+    "\n\nANSWER FORMAT: answer with a single JSON object and nothing else, instead of the "
+    "THOUGHTS/ACTION lines: "
+    '{"thoughts": "<your reasoning>", "action": {"type": "MOVE" | "ATTACK" | "SPEAK" | "WAIT", '
+    '"x": <int>, "y": <int>, "message": "<text, SPEAK only>"}}. '
+    '"x" and "y" are the coordinates of the action (not needed for WAIT).'
+)
+
+
+class StructuredAction(str):
+    """
+    Action string ("MOVE [3, 5]") that also carries its parsed fields, so it can
+    be used everywhere an action string is expected.
+
+    Attributes:
+        action_type (str): "MOVE", "ATTACK", "SPEAK" or "WAIT"
+        position (list): Target position [x, y], or None for WAIT
+        message (str): Message of a SPEAK action, None otherwise
+    """
+
+    def __new__(cls, action_type, position=None, message=None):
+        if action_type == "WAIT":
+            text = "WAIT"
+        elif action_type == "SPEAK":
+            text = f"SPEAK [{position[0]}, {position[1]}] {message}"
+        else:
+            text = f"{action_type} [{position[0]}, {position[1]}]"
+        action = super().__new__(cls, text)
+        action.action_type = action_type
+        action.position = position
+        action.message = message
+        return action
+
+    def __reduce__(self):
+        # Keep the fields through copy/deepcopy
+        return (StructuredAction, (self.action_type, self.position, self.message))
+
+
+def compile_schema(schema, path="answer"):
+    """
+    Build a validator function from a JSON schema, once.
+    Supports the subset used here: object (properties, required), string,
+    integer and enum.
+
+    Args:
+        schema (dict): The JSON schema
+        path (str): Name of the validated value, for error messages
+
+    Returns:
+        callable: Function raising ValueError if its argument doesn't match
+    """
+    kind = schema.get("type")
+    enum = set(schema["enum"]) if "enum" in schema else None
+
+    if kind == "object":
+        properties = {
+            name: compile_schema(sub_schema, f"{path}.{name}")
+            for name, sub_schema in schema.get("properties", {}).items()
+        }
+        required = schema.get("required", [])
+
+        def validate(value):
+            if not isinstance(value, dict):
+                raise ValueError(f"{path} must be an object")
+            for name in required:
+                if name not in value:
+                    raise ValueError(f"{path}.{name} is missing")
+            for name, check in properties.items():
+                if name in value:
+                    check(value[name])
+        return validate
+
+    python_type = {"string": str, "integer": int}[kind]
+
+    def validate(value):
+        # bool is an int subclass, but never a valid coordinate
+        if not isinstance(value, python_type) or isinstance(value, bool):
+            raise ValueError(f"{path} must be a {kind}")
+        if enum is not None and value not in enum:
+            raise ValueError(f"{path} must be one of {sorted(enum)}")
+    return validate
+
+
+validate_decision = compile_schema(DECISION_SCHEMA)
+
+
+def read_json_decision(content):
+    """
+    Parse and validate a JSON answer, raising on invalid ones.
+    Also used by the API turn server (api/turns.py), so the game and the
+    server accept exactly the same answers.
+
+    Args:
+        content (str): The model's answer
+
+    Returns:
+        tuple: (thoughts, StructuredAction)
+
+    Raises:
+        ValueError: If the answer is invalid (json.JSONDecodeError included)
+    """
+    # Tolerate code fences or text around the object
+    start, end = content.find('{'), content.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError("no JSON object found")
+    answer = json.loads(content[start:end + 1])
+    validate_decision(answer)
+
+    action = answer["action"]
+    action_type = action["type"]
+    missing = [name for name in ACTION_FIELDS[action_type] if name not in action]
+    if missing:
+        raise ValueError(f"{action_type} action without {', '.join(missing)}")
+    if action_type == "SPEAK" and not action["message"].strip():
+        raise ValueError("SPEAK action with an empty message")
+
+    position = [action["x"], action["y"]] if action_type != "WAIT" else None
+    message = action["message"].strip() if action_type == "SPEAK" else None
+    return answer["thoughts"].strip(), StructuredAction(action_type, position, message)
+
+
+def parse_json_decision(content):
+    """
+    Parse and validate a JSON answer.
+
+    Args:
+        content (str): The model's answer
+
+    Returns:
+        tuple: (thoughts, StructuredAction), or ("", "") if the answer is invalid
+    """
+    try:
+        return read_json_decision(content)
+    except ValueError as e:
+        print(f"Error parsing JSON response: {e}")
+        return "", ""
+
+
+def response_format_payload(response_format):
+    """
+    Build the 'response_format' field of a chat completion request.
+
+    Args:
+        response_format (str): "json_object" or "json_schema"
+
+    Returns:
+        dict: The field value
+    """
+    if response_format == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "decision", "schema": DECISION_SCHEMA, "strict": False}
+        }
+    return {"type": "json_object"}
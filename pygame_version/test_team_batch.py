@@ -0,0 +1,88 @@
+"""
+Request counts of TeamBatchAIInterface over whole team turns.
+Runs a headless game where the model is replaced by a function answering
+every team request with legal plans, and counts the requests.
+"""
+
+import os
+import re
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from actions import parse_action_string, resolve_action
+from ai_interface import TeamBatchAIInterface
+from constants import NB_ACTIONS_PER_TURN
+from game_state import GameState
+
+
+class CountingTeamBatchAI(TeamBatchAIInterface):
+    """Team batch AI whose model plans WAIT actions, recording every request."""
+
+    def __init__(self):
+        super().__init__(api_url="http://127.0.0.1:9/v1")
+        self.requests = []  # Agent IDs sent in each request
+
+    def _request_completion(self, system_message, user_content):
+        agent_ids = re.findall(r'^AGENT: (\S+)$', user_content, flags=re.MULTILINE)
+        self.requests.append(agent_ids)
+        lines = []
+        for agent_id in agent_ids:
+            lines += [f"AGENT: {agent_id}", "THOUGHTS: Holding the position."]
+            lines += ["ACTION: WAIT"] * NB_ACTIONS_PER_TURN
+        return '\n'.join(lines)
+
+
+class TeamBatchRequestsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game_state = GameState()
+        self.ais = {'red': CountingTeamBatchAI(), 'blue': CountingTeamBatchAI()}
+
+    def play_round(self):
+        """Play every action of a full round (each alive agent plays its turn)."""
+        current = self.game_state.turn['current']
+        while self.game_state.turn['current'] == current and not self.game_state.game_over:
+            agent = self.game_state.get_current_agent()
+            thoughts, action = self.ais[agent.team].get_agent_decision(agent, self.game_state.turn, self.game_state)
+            self.assertTrue(action, f"no decision for {agent.id}")
+            agent.add_historic_entry(current, self.game_state.turn['action_count'] + 1, thoughts, action)
+            action_obj = parse_action_string(action, agent.id, self.game_state)
+            if action_obj:
+                resolve_action(action_obj, self.game_state)
+            self.game_state.next_action()
+
+    def test_one_request_per_team_turn(self):
+        for round_number in range(1, 4):
+            self.play_round()
+            for team, ai in self.ais.items():
+                self.assertEqual(len(ai.requests), round_number, f"{team} requests after {round_number} rounds")
+
+        # The first request of a round plans the whole team
+        for team, ai in self.ais.items():
+            agents = {a.id for a in self.game_state.agents if a.team == team and a.is_alive()}
+            self.assertEqual(set(ai.requests[0]), agents)
+
+    def test_broken_plan_only_replans_its_agent(self):
+        red_ai = self.ais['red']
+        red_agents = [a for a in self.game_state.agents if a.team == 'red']
+        first, other, last = red_agents[0], red_agents[1], red_agents[2]
+
+        self.game_state.turn['agent_id'] = first.id
+        red_ai.get_agent_decision(first, self.game_state.turn, self.game_state)
+        self.assertEqual(len(red_ai.requests), 1)
+
+        # A teammate's plan turns illegal: it is planned again, the teammates
+        # playing after it keep their plan (the first agent, which already
+        # played this round, gets planned for its next turn)
+        plan = red_ai.plans[other.id]
+        last_plan = red_ai.plans[last.id]
+        plan['actions'][0] = ("Going out of the board.", "MOVE [999, 999]")
+        other_turn = dict(self.game_state.turn, agent_id=other.id, action_count=0, current=plan['turn'])
+        red_ai.get_agent_decision(other, other_turn, self.game_state)
+        self.assertEqual(set(red_ai.requests[1]), {other.id, first.id})
+        self.assertIs(red_ai.plans[last.id], last_plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Text rendering cache for BattleFieldAgents.
+Fonts are created once per size, and rendered text surfaces are kept in an LRU
+cache keyed by (font, text, color), so that labels which don't change between
+frames (agent IDs, titles, HP, bubble lines...) are rendered only once.
+"""
+
+from collections import OrderedDict
+
+import pygame
+from constants import *
+
+
+_fonts = {}
+
+
+def get_font(size):
+    """
+    Get the default font at a given size, created on first use.
+
+    Args:
+        size (int): Font size
+
+    Returns:
+        pygame.font.Font: The shared font
+    """
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.Font(None, size)
+        _fonts[size] = font
+    return font
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces.
+    The surfaces are shared: blit them, never draw on them.
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Surfaces kept; the least recently used is dropped beyond
+        """
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()  # (font, text, color) -> pygame.Surface
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        """
+        Render antialiased text, or get it from the cache.
+
+        Args:
+            font (pygame.font.Font): Font to use
+            text (str): Text to render
+            color (tuple): Text color RGB
+
+        Returns:
+            pygame.Surface: The rendered text
+        """
+        key = (font, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop every cached surface."""
+        self.surfaces.clear()
+
+
+_text_cache = TextCache()
+
+
+def render_text(font, text, color=COLOR_TEXT):
+    """
+    Render text through the shared cache.
+
+    Args:
+        font (pygame.font.Font): Font to use (see get_font)
+        text (str): Text to render
+        color (tuple): Text color RGB
+
+    Returns:
+        pygame.Surface: The rendered text (shared, don't draw on it)
+    """
+    return _text_cache.render(font, text, color)
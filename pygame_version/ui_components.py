@@ -6,6 +6,7 @@ Handles rendering of panels, agent cards, thought bubbles, and UI elements.
 import pygame
 from constants import *
 from agents import Agent
+from text_cache import get_font, render_text
 
 
 class Panel:
@@ -107,12 +108,12 @@ class AgentCard:
         y_offset = self.rect.y + 10
         
         # Agent ID
-        id_text = font_normal.render(self.agent.id, True, COLOR_TEXT)
+        id_text = render_text(font_normal, self.agent.id)
         surface.blit(id_text, (self.rect.x + 10, y_offset))
         y_offset += 25
         
         # Position
-        pos_text = font_small.render(f"Pos: [{self.agent.position[0]}, {self.agent.position[1]}]", True, COLOR_TEXT)
+        pos_text = render_text(font_small, f"Pos: [{self.agent.position[0]}, {self.agent.position[1]}]")
         surface.blit(pos_text, (self.rect.x + 10, y_offset))
         y_offset += 20
         
@@ -132,7 +133,7 @@ class AgentCard:
             pygame.draw.rect(surface, self.agent.get_hp_bar_color(), hp_fill_rect)
         
         # HP text
-        hp_text = font_small.render(f"{self.agent.life} / {AGENT_LIFE}", True, COLOR_TEXT)
+        hp_text = render_text(font_small, f"{self.agent.life} / {AGENT_LIFE}")
         text_x = self.rect.x + 10 + (hp_bar_width - hp_text.get_width()) // 2
         surface.blit(hp_text, (text_x, y_offset))
         
@@ -140,25 +141,37 @@ class AgentCard:
         if self.hovered and SHOW_STATS:
             self._draw_stats_tooltip(surface, font_small)
     
-    def _draw_stats_tooltip(self, surface, font_small):
+    def tooltip_rect(self, surface_width):
         """
-        Draw statistics tooltip when hovering.
+        Get where the statistics tooltip is drawn, next to the card.
         
         Args:
-            surface (pygame.Surface): Surface to draw on
-            font_small (pygame.font.Font): Small font
+            surface_width (int): Width of the surface, the tooltip stays inside it
+        
+        Returns:
+            pygame.Rect: The tooltip
         """
-        # Tooltip background
         tooltip_width = 150
         tooltip_height = 80
         tooltip_x = self.rect.right + 5
-        tooltip_y = self.rect.y
         
         # Make sure tooltip stays on screen
-        if tooltip_x + tooltip_width > surface.get_width():
+        if tooltip_x + tooltip_width > surface_width:
             tooltip_x = self.rect.x - tooltip_width - 5
         
-        tooltip_rect = pygame.Rect(tooltip_x, tooltip_y, tooltip_width, tooltip_height)
+        return pygame.Rect(tooltip_x, self.rect.y, tooltip_width, tooltip_height)
+    
+    def _draw_stats_tooltip(self, surface, font_small):
+        """
+        Draw statistics tooltip when hovering.
+        
+        Args:
+            surface (pygame.Surface): Surface to draw on
+            font_small (pygame.font.Font): Small font
+        """
+        # Tooltip background
+        tooltip_rect = self.tooltip_rect(surface.get_width())
+        tooltip_x, tooltip_y = tooltip_rect.topleft
         pygame.draw.rect(surface, COLOR_PANEL_BG, tooltip_rect)
         pygame.draw.rect(surface, COLOR_TEXT, tooltip_rect, 2)
         
@@ -175,7 +188,7 @@ class AgentCard:
         ]
         
         for text in stats_text:
-            text_surface = font_small.render(text, True, COLOR_TEXT)
+            text_surface = render_text(font_small, text)
             surface.blit(text_surface, (tooltip_x + 5, y_offset))
             y_offset += 15
 
@@ -218,7 +231,7 @@ class TargetCard:
         
         # Target ID/Name
         team_name = self.target.team.upper()
-        id_text = font_normal.render(f"{team_name} TARGET", True, COLOR_TEXT)
+        id_text = render_text(font_normal, f"{team_name} TARGET")
         surface.blit(id_text, (self.rect.x + 10, y_offset))
         y_offset += 25
         
@@ -238,7 +251,7 @@ class TargetCard:
             pygame.draw.rect(surface, self.target.get_hp_bar_color(), hp_fill_rect)
         
         # HP text
-        hp_text = font_small.render(f"{self.target.life} / {TARGET_LIFE}", True, COLOR_TEXT)
+        hp_text = render_text(font_small, f"{self.target.life} / {TARGET_LIFE}")
         text_x = self.rect.x + 10 + (hp_bar_width - hp_text.get_width()) // 2
         surface.blit(hp_text, (text_x, y_offset))
 
@@ -297,7 +310,7 @@ class ThoughtBubble:
         y_offset = self.y + padding
         
         # Draw agent ID header
-        header_text = font_normal.render(self.agent_id, True, COLOR_TEXT)
+        header_text = render_text(font_normal, self.agent_id)
         
         # Prepare text with prefixes
         thoughts_text = self.thoughts if self.thoughts.startswith("THOUGHTS:") else f"THOUGHTS: {self.thoughts}"
@@ -340,7 +353,7 @@ class ThoughtBubble:
         for line in thoughts_lines:
             if y_offset + line_height > self.y + self.height - padding:
                 break  # Don't overflow (though with unbounded height this shouldn't happen)
-            text_surface = font_small.render(line, True, COLOR_TEXT)
+            text_surface = render_text(font_small, line)
             surface.blit(text_surface, (self.x + padding, y_offset))
             y_offset += line_height
         
@@ -350,7 +363,7 @@ class ThoughtBubble:
         for line in action_lines:
             # if y_offset + line_height > self.y + self.height - padding:
             #     break
-            text_surface = font_small.render(line, True, COLOR_TEXT)
+            text_surface = render_text(font_small, line)
             surface.blit(text_surface, (self.x + padding, y_offset))
             y_offset += line_height
         
@@ -374,9 +387,8 @@ class ThoughtBubble:
         
         for word in words:
             test_line = ' '.join(current_line + [word])
-            test_surface = font.render(test_line, True, COLOR_TEXT)
             
-            if test_surface.get_width() <= max_width:
+            if font.size(test_line)[0] <= max_width:
                 current_line.append(word)
             else:
                 if current_line:
@@ -410,9 +422,9 @@ class LeftPanel(Panel):
         self.agent_cards = []
         self.target_cards = []
         self.scroll_offset = 0
-        self.font_title = pygame.font.Font(None, FONT_SIZE_TITLE)
-        self.font_normal = pygame.font.Font(None, FONT_SIZE_NORMAL)
-        self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
+        self.font_title = get_font(FONT_SIZE_TITLE)
+        self.font_normal = get_font(FONT_SIZE_NORMAL)
+        self.font_small = get_font(FONT_SIZE_SMALL)
     
     def update_cards(self):
         """Update agent and target cards based on current game state."""
@@ -480,6 +492,21 @@ class LeftPanel(Panel):
         for card in self.agent_cards:
             card.check_hover(mouse_pos)
     
+    def dirty_items(self):
+        """
+        Describe what the panel shows this frame, for dirty-rect rendering.
+        
+        Returns:
+            dict: Item name -> (screen rect, key)
+        """
+        hovered = [card.agent.id for card in self.agent_cards if card.hovered]
+        items = {'left_panel': (self.rect, (self.game_state.version, len(self.agent_cards), tuple(hovered)))}
+        if SHOW_STATS:
+            for card in self.agent_cards:
+                if card.hovered:
+                    items[('tooltip', card.agent.id)] = (card.tooltip_rect(WINDOW_WIDTH), self.game_state.version)
+        return items
+    
     def draw(self, surface):
         """
         Draw the left panel.
@@ -491,7 +518,7 @@ class LeftPanel(Panel):
         super().draw(surface)
         
         # Draw title
-        title_text = self.font_title.render("STATUS", True, COLOR_TEXT)
+        title_text = render_text(self.font_title, "STATUS")
         surface.blit(title_text, (PANEL_PADDING, PANEL_PADDING))
         
         # Draw target cards
@@ -556,7 +583,7 @@ class SystemBubble:
         
         # Draw text
         for line in lines:
-            text_surface = font_small.render(line, True, COLOR_TEXT)
+            text_surface = render_text(font_small, line)
             surface.blit(text_surface, (self.x + padding, y_offset))
             y_offset += line_height
             
@@ -570,8 +597,7 @@ class SystemBubble:
         
         for word in words:
             test_line = ' '.join(current_line + [word])
-            test_surface = font.render(test_line, True, COLOR_TEXT)
-            if test_surface.get_width() <= max_width:
+            if font.size(test_line)[0] <= max_width:
                 current_line.append(word)
             else:
                 if current_line:
@@ -599,10 +625,11 @@ class RightPanel(Panel):
             WINDOW_HEIGHT
         )
         self.thought_bubbles = []
+        self.live_bubble = None  # Bubble of the reasoning being streamed
         self.scroll_offset = 0
-        self.font_title = pygame.font.Font(None, FONT_SIZE_TITLE)
-        self.font_normal = pygame.font.Font(None, FONT_SIZE_NORMAL)
-        self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
+        self.font_title = get_font(FONT_SIZE_TITLE)
+        self.font_normal = get_font(FONT_SIZE_NORMAL)
+        self.font_small = get_font(FONT_SIZE_SMALL)
         self.max_scroll = 0
     
     def add_thought_bubble(self, agent_id, team, thoughts, action):
@@ -615,6 +642,11 @@ class RightPanel(Panel):
             thoughts (str): Agent's reasoning
             action (str): Action taken
         """
+        # The final decision replaces the streamed reasoning
+        if self.live_bubble:
+            self.thought_bubbles.remove(self.live_bubble)
+            self.live_bubble = None
+        
         bubble = ThoughtBubble(
             agent_id,
             team,
@@ -630,6 +662,36 @@ class RightPanel(Panel):
         self._update_max_scroll()
         self.scroll_offset = self.max_scroll
 
+    def show_partial_thoughts(self, agent_id, team, thoughts):
+        """
+        Show or update the reasoning of an agent while it is being streamed.
+        
+        Args:
+            agent_id (str): Agent ID
+            team (str): Agent team
+            thoughts (str): Reasoning received so far
+        """
+        if self.live_bubble and self.live_bubble.agent_id == agent_id:
+            if self.live_bubble.thoughts == thoughts:
+                return
+            self.live_bubble.thoughts = thoughts
+        else:
+            if self.live_bubble:
+                self.thought_bubbles.remove(self.live_bubble)
+            self.live_bubble = ThoughtBubble(
+                agent_id,
+                team,
+                thoughts,
+                "...",
+                self.rect.x + PANEL_PADDING,
+                0,
+                RIGHT_PANEL_WIDTH - 2 * PANEL_PADDING
+            )
+            self.thought_bubbles.append(self.live_bubble)
+        
+        self._update_max_scroll()
+        self.scroll_offset = self.max_scroll
+
     def add_system_message(self, message):
         """
         Add a system message bubble.
@@ -675,9 +737,20 @@ class RightPanel(Panel):
         self._update_max_scroll()
         self.scroll_offset = max(0, min(self.scroll_offset, self.max_scroll))
     
+    def dirty_items(self):
+        """
+        Describe what the panel shows this frame, for dirty-rect rendering.
+        
+        Returns:
+            dict: Item name -> (screen rect, key)
+        """
+        live_thoughts = self.live_bubble.thoughts if self.live_bubble else None
+        return {'right_panel': (self.rect, (len(self.thought_bubbles), live_thoughts, self.scroll_offset))}
+    
     def clear_bubbles(self):
         """Clear all thought bubbles."""
         self.thought_bubbles = []
+        self.live_bubble = None
         self.scroll_offset = 0
         self.max_scroll = 0
     
@@ -692,7 +765,7 @@ class RightPanel(Panel):
         super().draw(surface)
         
         # Draw title
-        title_text = self.font_title.render("HISTORIC", True, COLOR_TEXT)
+        title_text = render_text(self.font_title, "HISTORIC")
         surface.blit(title_text, (self.rect.x + PANEL_PADDING, PANEL_PADDING))
         
         # Clip area for bubbles to avoid drawing over title or outside panel
@@ -703,7 +776,7 @@ class RightPanel(Panel):
             self.rect.height - (PANEL_PADDING + 40)
         )
         old_clip = surface.get_clip()
-        surface.set_clip(clip_rect)
+        surface.set_clip(clip_rect.clip(old_clip))
         
         # Draw thought bubbles
         # We draw them starting from the top + title offset, shifted by scroll_offset
@@ -767,7 +840,7 @@ class BottomPanel(Panel):
         """
         super().__init__(x, y, width, height)
         self.renderer = renderer
-        self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
+        self.font_small = get_font(FONT_SIZE_SMALL)
         
         self.buttons = []
         self._setup_buttons()
@@ -806,6 +879,16 @@ class BottomPanel(Panel):
                 elif button['id'] == 2:
                     self.renderer.show_agent_vision = not self.renderer.show_agent_vision
 
+    def dirty_items(self):
+        """
+        Describe what the panel shows this frame, for dirty-rect rendering.
+        
+        Returns:
+            dict: Item name -> (screen rect, key)
+        """
+        flags = (self.renderer.show_possible_moves, self.renderer.show_agent_position, self.renderer.show_agent_vision)
+        return {'bottom_panel': (self.rect, flags)}
+    
     def draw(self, surface):
         """
         Draw the bottom panel with buttons and legend.
@@ -833,7 +916,7 @@ class BottomPanel(Panel):
             pygame.draw.rect(surface, COLOR_TEXT, button['rect'], 1, border_radius=5)
 
             # Draw button text
-            text_surf = self.font_small.render(button['text'], True, COLOR_TEXT)
+            text_surf = render_text(self.font_small, button['text'])
             text_rect = text_surf.get_rect(center=button['rect'].center)
             surface.blit(text_surf, text_rect)
         
@@ -853,7 +936,7 @@ class BottomPanel(Panel):
             pygame.draw.rect(surface, color, swatch_rect)
             
             # Draw text
-            text_surf = self.font_small.render(text, True, COLOR_TEXT)
+            text_surf = render_text(self.font_small, text)
             surface.blit(text_surf, (legend_x + 30, legend_y + 2))
             
             legend_x += 180
\ No newline at end of file
@@ -3,10 +3,10 @@ Utility functions for the BattleFieldAgents game.
 Includes pathfinding (A*), vision calculation, and helper functions.
 """
 
-from bfa.core.constants import *
+from constants import *
 import math
 from heapq import heappush, heappop
-from bfa.entities.agents import Obstacle
+from agents import Obstacle
 
 
 def distance(pos1, pos2):
@@ -370,9 +370,13 @@ def compute_last_positions_seen(agent, turn):
             }
     return last_seen
 
-def format_agent_state(agent, turn, agents, targets, obstacles):
+def format_agent_state(agent, turn, agents, targets, obstacles, memory_policy=None):
     """
     Format the agent's state for sending to the AI API.
+    
+    Args:
+        memory_policy (MemoryPolicy): Selects the messages and historic entries
+            to send (default: everything, see memory.py)
     """
     # Get possible moves
     possible_moves = get_possible_moves(agent, agents, targets, obstacles)
@@ -398,9 +402,15 @@ def format_agent_state(agent, turn, agents, targets, obstacles):
     visible_obstacles = [e for e in agent.sight if e['kind'] == 'obstacles']
     visible_bonuses = [e for e in agent.sight if e['kind'] == 'bonus']
     
+    messages = agent.messages
+    historic = agent.historic
+    if memory_policy is not None:
+        messages = memory_policy.apply_messages(messages)
+        historic = memory_policy.apply_historic(historic)
+    
     state = {
-        'messages': agent.messages,
-        'historic': agent.historic,
+        'messages': messages,
+        'historic': historic,
         'lastPosSeen': agent.last_pos_seen,
         'position': agent.position,
         'life': agent.life,
@@ -414,4 +424,25 @@ def format_agent_state(agent, turn, agents, targets, obstacles):
         'possibleActions': move_actions + attack_actions + speak_actions
     }
     
-    return state
\ No newline at end of file
+    return state
+
+def is_action_legal(action, state):
+    """
+    Check if an action string is allowed in a formatted agent state.
+    
+    Args:
+        action (str): Action string like "MOVE [3, 5]" or "SPEAK [1, 2] Hello!"
+        state (dict): Agent state, as returned by format_agent_state()
+    
+    Returns:
+        bool: True if the action is one of the state's possible actions
+    """
+    action = ' '.join(action.strip().strip('"').split())
+    if action == 'WAIT':
+        return True
+    
+    possible_actions = state['possibleActions']
+    if action.startswith('SPEAK'):
+        # The message is free, only the recipient must be reachable
+        return any(action.startswith(a + ' ') for a in possible_actions if a.startswith('SPEAK'))
+    return action in possible_actions